@@ -1,9 +1,22 @@
 # app/__init__.py
+import os
+import sys
+
+import click
 from flask import Flask
-from .config import Config
-from .extensions import db
+from flask.helpers import get_debug_flag
+from flask_migrate import stamp
+from sqlalchemy import inspect
+
+from .config import BASE_DIR, Config
+from .extensions import db, migrate
+from .storage import install_sqlite_profile
 from .routes.main import main_bp
 from .routes.health import health_bp
+from .routes.jobs import jobs_bp
+from .cli import register_cli
+from .services.ingest_jobs import resume_ingest_jobs
+from .services.runbook_jobs import resume_runbook_jobs
 
 def create_app():
     # Do NOT use instance_relative_config — it causes DB path confusion
@@ -14,13 +27,79 @@ def create_app():
 
     # Initialize SQLAlchemy
     db.init_app(app)
+    migrate.init_app(app, db, directory=str(BASE_DIR / "migrations"))
 
     # Ensure the database is created in the CORRECT project root
     with app.app_context():
-        db.create_all()
+        # Before the first connection, so every pooled one gets the pragmas
+        install_sqlite_profile(db.engine, app.config)
+        _prepare_database()
+        if _serving():
+            _resume_background_jobs(app)
 
     # Register routes
     app.register_blueprint(main_bp)
     app.register_blueprint(health_bp, url_prefix="/health")
+    app.register_blueprint(jobs_bp, url_prefix="/jobs")
+
+    # flask import-snow, ...
+    register_cli(app)
 
     return app
+
+
+def _prepare_database():
+    """
+    Create the schema on an empty database and mark it as migrated; leave
+    any other database to `flask db upgrade`. create_all() on an existing
+    database would create new tables ahead of the migrations that add them,
+    and those migrations would then fail.
+    """
+    tables = set(inspect(db.engine).get_table_names())
+    if not tables:
+        db.create_all()
+        stamp()
+    elif "alembic_version" not in tables:
+        print(
+            "Database predates migrations: run `flask db stamp e4f9057b5a5b` "
+            "once, then `flask db upgrade`."
+        )
+
+
+def _serving() -> bool:
+    """
+    True under a WSGI server or `flask run`; False for other CLI commands,
+    which must not pick up background work (or wait for it at exit), and
+    for the debug reloader's watcher process, which never serves requests
+    and would otherwise run jobs beside the server it restarts.
+    """
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        return True     # the reloader's serving child
+    ctx = click.get_current_context(silent=True)
+    if ctx is not None:
+        if ctx.info_name != "run":
+            return False
+        debug = ctx.params.get("debug")
+        reload = ctx.params.get("reload")
+        if reload is None:
+            reload = get_debug_flag() if debug is None else debug
+        return not reload
+    # `python wsgi.py` always runs with the reloader
+    main = getattr(sys.modules.get("__main__"), "__file__", None) or ""
+    return os.path.basename(main) != "wsgi.py"
+
+
+def _resume_background_jobs(app):
+    tables = set(inspect(db.engine).get_table_names())
+    if "alembic_version" not in tables or not {"ingest_jobs", "runbook_jobs"} <= tables:
+        return
+    try:
+        ingests = resume_ingest_jobs(app)
+        runbooks = resume_runbook_jobs(app)
+    except Exception as e:
+        # Usually a schema that still needs `flask db upgrade`
+        db.session.rollback()
+        print("Could not resume background jobs:", e)
+        return
+    if ingests or runbooks:
+        print(f"Resumed {ingests} ingest job(s) and {runbooks} queued runbook job(s)")
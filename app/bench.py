@@ -0,0 +1,253 @@
+# app/bench.py
+"""
+Micro-benchmarks behind the `flask bench-*` commands.
+
+Each benchmark checks equivalence against the reference path before it
+reports throughput, so a speed-up can never hide a behaviour change.
+"""
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.exc import OperationalError
+
+from .extensions import db
+from .models import Ticket
+from .services.phi_scrub import _scrub_sequential, scrub_many, scrub_text
+from .storage import install_sqlite_profile
+
+# Hand-picked strings where pass order, word boundaries or overlapping
+# patterns decide the output; the scrubber must match the reference on all.
+SCRUB_EQUIVALENCE_CORPUS = [
+    "",
+    "no phi here at all",
+    "Call John Smith at 555-123-4567 about MRN 1234567.",
+    "John Smith@example.com wrote in",
+    "jsmith@example.com123-45-6789",
+    "a@b.com555-123-4567",
+    "ssn 123-45-6789, dob 01/02/1980, phone (555) 123-4567",
+    "+1 555 123 4567 / 1-555-123-4567 / 555.123.4567",
+    "x(555)123-4567 and a+1 555 123 4567",
+    "John Mrn 1234567 Smith",
+    "mrn:12345 MRN 42 Mrn:9",
+    "12345678901 1234567890 123456789 1234567",
+    "01-02-2024 1/2/24 12/31/1999-555-1234",
+    "Dr Kelly Jones and Mary Ann O Brien met Bob",
+    "OUTLOOK Issue Reported By Jane Doe On Monday",
+    "user_John Smith x1234567 John_Smith",
+    "phone:5551234567,ssn:123-45-6789,email:a.b+c@d-e.org",
+    "Éva Smith and Ana Éclair",
+    "line one John\nSmith line two 555\n123 4567",
+    "tab\tJohn\tSmith\t555-1234",
+    "555-1234-5678 123-456-7890 12-34-5678",
+]
+
+
+def _random_ticket_text(rng: random.Random) -> str:
+    words = (
+        "the user reported that outlook is slow after password reset please "
+        "call back at extension when possible vpn laptop printer access"
+    ).split()
+    phi = [
+        "John Smith", "Mary Ann Jones", "jsmith@example.com", "555-123-4567",
+        "(555) 123-4567", "MRN 1234567", "01/02/1980", "123-45-6789", "INC0012345",
+    ]
+    out = []
+    for _ in range(rng.randint(5, 120)):
+        out.append(rng.choice(phi) if rng.random() < 0.05 else rng.choice(words))
+    return " ".join(out)
+
+
+def bench_scrub(texts: list[str], rounds: int = 3) -> dict:
+    """
+    Compare the reference sequential scrubber with scrub_text / scrub_many.
+
+    Returns mismatching inputs (if any) and the best-of-`rounds` MB/s.
+    """
+    mismatches = [
+        t for t in SCRUB_EQUIVALENCE_CORPUS + texts
+        if scrub_text(t) != _scrub_sequential(t)
+    ]
+
+    size_mb = sum(len(t) for t in texts) / 1e6
+    results = {"mismatches": mismatches, "texts": len(texts), "mb": size_mb}
+
+    for label, fn in (
+        ("reference", lambda: [_scrub_sequential(t) for t in texts]),
+        ("scrub_text", lambda: [scrub_text(t) for t in texts]),
+        ("scrub_many", lambda: scrub_many(texts)),
+    ):
+        best = None
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        results[label] = size_mb / max(best, 1e-9)
+
+    return results
+
+
+def synthetic_scrub_corpus(count: int, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    return [_random_ticket_text(rng) for _ in range(count)]
+
+
+# -------------------------------------------------------------------
+# SQLite storage profile under concurrent load
+# -------------------------------------------------------------------
+
+# What a fresh connection gets without the profile (pysqlite's own 5s wait)
+SQLITE_DEFAULT_PROFILE = {
+    "SQLITE_JOURNAL_MODE": "DELETE",
+    "SQLITE_SYNCHRONOUS": "FULL",
+    "SQLITE_CACHE_SIZE_KB": 2000,
+    "SQLITE_MMAP_SIZE": 0,
+    "SQLITE_BUSY_TIMEOUT_MS": 5000,
+}
+
+BENCH_TOPICS = ["vpn", "password", "printer", "email", "network", "hardware", "access", "other"]
+
+# The topic page's first keyset page (routes/main.py _topic_page)
+_TOPIC_PAGE_SQL = text(
+    "SELECT id, number, short_description, opened_at, closed_at FROM tickets "
+    "WHERE topic = :topic AND opened_at IS NOT NULL "
+    "ORDER BY opened_at DESC, id DESC LIMIT 51"
+)
+
+
+def _bench_ticket_templates(count: int = 1000, seed: int = 1) -> list[dict]:
+    """Row bodies built once, so the timed loops measure SQLite, not text generation."""
+    rng = random.Random(seed)
+    return [
+        {
+            "short_description": _random_ticket_text(rng)[:120],
+            "description": _random_ticket_text(rng),
+            "short_description_scrubbed": _random_ticket_text(rng)[:120],
+            "description_scrubbed": _random_ticket_text(rng)[:500],
+            "topic": rng.choice(BENCH_TOPICS),
+        }
+        for _ in range(count)
+    ]
+
+
+def _bench_tickets(templates: list[dict], start: int, count: int) -> list[dict]:
+    now = datetime(2024, 1, 1)
+    return [
+        dict(
+            templates[(start + i) % len(templates)],
+            number=f"BENCH{start + i:09d}",
+            opened_at=now - timedelta(minutes=start + i),
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def _bench_engine(path: str, profile: dict, engine_options: dict):
+    engine = create_engine(f"sqlite:///{path}", **engine_options)
+    install_sqlite_profile(engine, profile)
+    return engine
+
+
+def _bench_reader(path: str, profile: dict, engine_options: dict, seconds: float, seed: int) -> dict:
+    """Process entry point: topic pages back to back for `seconds`."""
+    engine = _bench_engine(path, profile, engine_options)
+    rng = random.Random(seed)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(_TOPIC_PAGE_SQL, {"topic": rng.choice(BENCH_TOPICS)}).fetchall()
+        except OperationalError as e:
+            errors.append(str(e.orig))
+            continue
+        latencies.append(time.perf_counter() - t0)
+    engine.dispose()
+    return {"latencies": latencies, "errors": errors}
+
+
+def _bench_writer(path: str, profile: dict, engine_options: dict, seconds: float,
+                  start: int, batch: int) -> dict:
+    """Process entry point: ingest-sized insert transactions for `seconds`."""
+    engine = _bench_engine(path, profile, engine_options)
+    templates = _bench_ticket_templates()
+    written, errors = 0, []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        rows = _bench_tickets(templates, start, batch)
+        start += batch
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(Ticket.__table__), rows)
+        except OperationalError as e:
+            errors.append(str(e.orig))
+            continue
+        written += batch
+    engine.dispose()
+    return {"written": written, "errors": errors}
+
+
+def _bench_sqlite_once(path: str, profile: dict, engine_options: dict, seed_rows: int,
+                       readers: int, writers: int, batch: int, seconds: float) -> dict:
+    engine = _bench_engine(path, profile, engine_options)
+    db.metadata.create_all(engine)
+    templates = _bench_ticket_templates()
+    with engine.begin() as conn:
+        for start in range(0, seed_rows, 5000):
+            conn.execute(insert(Ticket.__table__), _bench_tickets(templates, start, min(5000, seed_rows - start)))
+    engine.dispose()
+
+    # Separate processes, like the web app and a CLI import: threads in one
+    # interpreter would mostly measure the GIL
+    with ProcessPoolExecutor(max_workers=readers + writers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        reads = [
+            pool.submit(_bench_reader, path, profile, engine_options, seconds, 100 + i)
+            for i in range(readers)
+        ]
+        writes = [
+            pool.submit(_bench_writer, path, profile, engine_options, seconds, seed_rows + i * 10_000_000, batch)
+            for i in range(writers)
+        ]
+        reads = [f.result() for f in reads]
+        writes = [f.result() for f in writes]
+
+    latencies = sorted(t for r in reads for t in r["latencies"])
+    errors = [e for r in reads + writes for e in r["errors"]]
+    return {
+        "reads_per_sec": len(latencies) / seconds,
+        "read_p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+        "read_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else None,
+        "read_max_ms": latencies[-1] * 1000 if latencies else None,
+        "rows_written_per_sec": sum(w["written"] for w in writes) / seconds,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def bench_sqlite(profile: dict, engine_options: dict, seed_rows: int = 50_000, readers: int = 4,
+                 writers: int = 1, batch: int = 500, seconds: float = 10.0, directory: str = None) -> dict:
+    """
+    Concurrent topic-page reads against batched ticket inserts, on a
+    throwaway database file in `directory` (fsync cost depends on the
+    filesystem), once with SQLite's defaults and once with `profile`
+    (SQLITE_* config keys). Returns {"default": ..., "profile": ...}.
+    """
+    profile = {key: profile[key] for key in SQLITE_DEFAULT_PROFILE if key in profile}
+    results = {}
+    for label, pragmas in (("default", SQLITE_DEFAULT_PROFILE), ("profile", profile)):
+        with tempfile.TemporaryDirectory(dir=directory) as tmp:
+            path = os.path.join(tmp, "bench.db")
+            results[label] = _bench_sqlite_once(
+                path, pragmas, engine_options, seed_rows, readers, writers, batch, seconds,
+            )
+    return results
@@ -0,0 +1,376 @@
+# app/cli.py
+import glob
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .bench import bench_scrub, bench_sqlite, synthetic_scrub_corpus
+from .extensions import db
+from .models import IngestJob, RunbookJob, Ticket
+from .services import llm_cache
+from .services.classifier import TAXONOMY_VERSION
+from .services.ingest_jobs import classify_unassigned_tickets, record_job_progress
+from .services.job_leases import claim_values, job_lease
+from .services.reclassify import RECLASSIFY_CHUNK_SIZE, reclassify_tickets
+from .services.runbook_jobs import (
+    enqueue_stale_runbooks, stale_topics, start_runbook_workers, wait_for_runbook_workers,
+)
+from .services.snow_ingest import ingest_records, parse_snow_file
+from .services.topic_stats import rebuild_topic_stats
+
+
+def register_cli(app):
+    app.cli.add_command(import_snow_command)
+    app.cli.add_command(reclassify_command)
+    app.cli.add_command(refresh_runbooks_command)
+    app.cli.add_command(rebuild_topic_stats_command)
+    app.cli.add_command(bench_scrub_command)
+    app.cli.add_command(bench_sqlite_command)
+    app.cli.add_command(llm_cache_group)
+
+
+# -------------------------------------------------------------------
+# flask import-snow
+# -------------------------------------------------------------------
+
+def _expand_sources(sources) -> list[str]:
+    """Directories, glob patterns and plain files -> unique CSV paths."""
+    paths = set()
+    for src in sources:
+        if os.path.isdir(src):
+            paths.update(glob.glob(os.path.join(src, "*.csv")))
+        elif glob.has_magic(src):
+            paths.update(glob.glob(src, recursive=True))
+        elif os.path.isfile(src):
+            paths.add(src)
+        else:
+            raise click.BadParameter(f"No such file, directory or pattern: {src}")
+
+    return [os.path.abspath(p) for p in paths]
+
+
+def _file_fingerprint(path: str) -> str:
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+@click.command("import-snow")
+@click.argument("sources", nargs=-1, required=True)
+@click.option("--workers", default=os.cpu_count() or 2, show_default=True,
+              help="Processes used to parse files in parallel.")
+@click.option("--force", is_flag=True,
+              help="Re-import files that a previous run already finished.")
+@click.option("--no-classify", is_flag=True,
+              help="Skip topic assignment after the import.")
+@with_appcontext
+def import_snow_command(sources, workers, force, no_classify):
+    """
+    Bulk-import ServiceNow CSV exports from files, directories or globs.
+
+    Files are parsed in a process pool and written by this single process
+    in modification-time order, so when the same ticket appears in several
+    exports the most recently modified file wins. Each finished file is
+    recorded as an IngestJob; re-running the command skips files whose size
+    and mtime are unchanged since their last successful import.
+    """
+    paths = sorted(_expand_sources(sources), key=os.path.getmtime)
+
+    todo = []
+    for path in paths:
+        fingerprint = _file_fingerprint(path)
+        done = (
+            IngestJob.query
+            .filter_by(path=path, fingerprint=fingerprint, status="done")
+            .first()
+        )
+        if done and not force:
+            click.echo(f"skip  {path} (imported by job #{done.id})")
+            continue
+        todo.append((path, fingerprint))
+
+    if not todo:
+        click.echo("Nothing to import.")
+        return
+
+    click.echo(f"Importing {len(todo)} file(s) with {workers} parser process(es)...")
+
+    total_rows = 0
+    failed = []
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # At most `workers` files are parsed ahead of the writer. Each parsed
+        # file is held whole in memory, so peak memory is roughly the largest
+        # files' size times `workers`; lower --workers for very large exports
+        pending = deque()
+        queue = iter(todo)
+
+        def _submit_next():
+            item = next(queue, None)
+            if item is not None:
+                pending.append((item, pool.submit(parse_snow_file, item[0])))
+
+        for _ in range(workers):
+            _submit_next()
+
+        while pending:
+            (path, fingerprint), future = pending.popleft()
+
+            job = IngestJob(
+                filename=os.path.basename(path),
+                path=path,
+                fingerprint=fingerprint,
+                status="running",
+                started_at=datetime.utcnow(),
+                **claim_values(),   # so a server doesn't take it as abandoned
+            )
+            db.session.add(job)
+            db.session.commit()
+
+            t0 = time.perf_counter()
+            try:
+                with job_lease(current_app._get_current_object(), IngestJob, job.id):
+                    try:
+                        records = future.result()
+                    finally:
+                        _submit_next()
+                    stats = ingest_records(records, on_progress=lambda s: record_job_progress(job, s))
+
+                job.status = "done"
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+
+            except Exception as e:
+                # One bad file must not abort the rest of the backfill
+                db.session.rollback()
+                job.status = "failed"
+                job.error = str(e)
+                job.finished_at = datetime.utcnow()
+                db.session.commit()
+                failed.append(path)
+                click.echo(f"FAIL  {path}: {e}", err=True)
+                continue
+
+            elapsed = time.perf_counter() - t0
+            total_rows += stats["rows"]
+            click.echo(
+                f"done  {path}: {stats['rows']} rows in {elapsed:.1f}s "
+                f"({stats['rows'] / max(elapsed, 1e-9):,.0f} rows/s) - "
+                f"{stats['inserted']} inserted, {stats['updated']} updated, "
+                f"{stats['unchanged']} unchanged, {stats['skipped']} skipped"
+            )
+
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"Imported {total_rows} rows from {len(todo) - len(failed)} file(s) in {elapsed:.1f}s "
+        f"({total_rows / max(elapsed, 1e-9):,.0f} rows/s overall)."
+    )
+
+    if not no_classify:
+        t0 = time.perf_counter()
+        classified = classify_unassigned_tickets()
+        click.echo(f"Classified {classified} tickets in {time.perf_counter() - t0:.1f}s.")
+
+    if failed:
+        raise click.ClickException(f"{len(failed)} file(s) failed; see the FAIL lines above.")
+
+
+# -------------------------------------------------------------------
+# flask reclassify
+# -------------------------------------------------------------------
+
+@click.command("reclassify")
+@click.option("--workers", default=os.cpu_count() or 2, show_default=True,
+              help="Processes used to classify each page.")
+@click.option("--chunk-size", default=RECLASSIFY_CHUNK_SIZE, show_default=True,
+              help="Tickets read per keyset page.")
+@with_appcontext
+def reclassify_command(workers, chunk_size):
+    """Re-run the taxonomy over tickets classified by an older TAXONOMY version."""
+    click.echo(f"Reclassifying stale tickets to taxonomy {TAXONOMY_VERSION}...")
+    started = time.perf_counter()
+
+    stats = reclassify_tickets(
+        workers=workers,
+        chunk_size=chunk_size,
+        on_progress=lambda s: click.echo(
+            f"  {s['scanned']} scanned, {s['changed']} changed, {s['unchanged']} unchanged"
+        ),
+    )
+
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"Done: {stats['scanned']} tickets in {elapsed:.1f}s "
+        f"({stats['scanned'] / max(elapsed, 1e-9):,.0f} tickets/s), "
+        f"{stats['changed']} topics changed."
+    )
+
+
+# -------------------------------------------------------------------
+# flask refresh-runbooks
+# -------------------------------------------------------------------
+
+@click.command("refresh-runbooks")
+@click.option("--dry-run", is_flag=True,
+              help="List stale topics and their priority without queueing them.")
+@with_appcontext
+def refresh_runbooks_command(dry_run):
+    """
+    Queue regeneration for every topic whose tickets changed since its
+    runbook was built, then work through the queue (meant for cron).
+
+    Jobs run most-new-tickets first on RUNBOOK_WORKERS threads; jobs queued
+    earlier and not yet picked up are drained as well.
+    """
+    stale = stale_topics()
+    for topic, count in sorted(stale.items(), key=lambda kv: -kv[1]):
+        click.echo(f"stale {topic}: {count} new/changed tickets")
+
+    if dry_run:
+        return
+
+    started = time.perf_counter()
+    app = current_app._get_current_object()
+    enqueue_stale_runbooks(app)
+    queued = RunbookJob.query.filter_by(status="queued").count()
+    click.echo(f"{queued} job(s) queued, {app.config['RUNBOOK_WORKERS']} worker(s).")
+
+    start_runbook_workers(app)    # also picks up jobs queued before this run
+    wait_for_runbook_workers()
+
+    since = datetime.utcnow() - timedelta(seconds=time.perf_counter() - started)
+    finished = RunbookJob.query.filter(RunbookJob.finished_at >= since).all()
+    for job in finished:
+        click.echo(f"{job.status:<5} {job.topic}" + (f": {job.error}" if job.error else ""))
+    click.echo(f"Finished {len(finished)} job(s) in {time.perf_counter() - started:.1f}s.")
+
+
+# -------------------------------------------------------------------
+# flask rebuild-topic-stats
+# -------------------------------------------------------------------
+
+@click.command("rebuild-topic-stats")
+@with_appcontext
+def rebuild_topic_stats_command():
+    """Recompute the dashboard's topic_stats table from the tickets (after manual SQL edits)."""
+    started = time.perf_counter()
+    count = rebuild_topic_stats()
+    click.echo(f"Rebuilt stats for {count} topics in {time.perf_counter() - started:.1f}s.")
+
+
+# -------------------------------------------------------------------
+# flask bench-scrub
+# -------------------------------------------------------------------
+
+@click.command("bench-scrub")
+@click.option("--synthetic", default=20000, show_default=True,
+              help="Generated ticket texts added to the corpus.")
+@click.option("--from-db", "from_db", default=0, show_default=True,
+              help="Also scrub the descriptions of this many stored tickets.")
+@click.option("--rounds", default=3, show_default=True,
+              help="Timed rounds per implementation (best is reported).")
+@with_appcontext
+def bench_scrub_command(synthetic, from_db, rounds):
+    """Check scrub_text against the reference scrubber and report MB/s."""
+    texts = synthetic_scrub_corpus(synthetic)
+    if from_db:
+        rows = db.session.query(Ticket.short_description, Ticket.description).limit(from_db).all()
+        texts += [t for row in rows for t in row if t]
+
+    result = bench_scrub(texts, rounds=rounds)
+
+    click.echo(f"{result['texts']} texts, {result['mb']:.1f} MB")
+    for label in ("reference", "scrub_text", "scrub_many"):
+        click.echo(f"  {label:<10} {result[label]:6.1f} MB/s")
+
+    if result["mismatches"]:
+        for text in result["mismatches"][:10]:
+            click.echo(f"MISMATCH: {text!r}", err=True)
+        raise click.ClickException(f"{len(result['mismatches'])} output(s) differ from the reference")
+
+    click.echo("Output identical to the reference scrubber.")
+
+
+# -------------------------------------------------------------------
+# flask bench-sqlite
+# -------------------------------------------------------------------
+
+@click.command("bench-sqlite")
+@click.option("--seed-rows", default=50_000, show_default=True,
+              help="Tickets in the throwaway database before the run.")
+@click.option("--readers", default=4, show_default=True,
+              help="Processes reading topic pages.")
+@click.option("--writers", default=1, show_default=True,
+              help="Processes inserting ticket batches.")
+@click.option("--batch", default=500, show_default=True,
+              help="Tickets per write transaction.")
+@click.option("--seconds", default=10.0, show_default=True,
+              help="Duration of each run.")
+@click.option("--dir", "directory", default=None,
+              help="Where to put the temporary database (default: next to the app's).")
+@with_appcontext
+def bench_sqlite_command(seed_rows, readers, writers, batch, seconds, directory):
+    """
+    Compare SQLite's defaults with the configured storage profile under
+    concurrent reads and writes, on a temporary database (the app's own
+    database is not touched).
+    """
+    config = current_app.config
+    result = bench_sqlite(
+        config, config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        seed_rows=seed_rows, readers=readers, writers=writers, batch=batch, seconds=seconds,
+        directory=directory or os.path.dirname(db.engine.url.database or "") or None,
+    )
+
+    click.echo(f"{readers} reader(s), {writers} writer(s) x {batch} rows, {seconds:g}s, {seed_rows} seed rows")
+    for label in ("default", "profile"):
+        r = result[label]
+        p50 = f"{r['read_p50_ms']:.1f}" if r["read_p50_ms"] is not None else "-"
+        p95 = f"{r['read_p95_ms']:.1f}" if r["read_p95_ms"] is not None else "-"
+        worst = f"{r['read_max_ms']:.0f}" if r["read_max_ms"] is not None else "-"
+        click.echo(
+            f"  {label:<8} {r['reads_per_sec']:8.0f} reads/s  p50 {p50} ms  p95 {p95} ms  max {worst} ms"
+            f"  {r['rows_written_per_sec']:8.0f} rows/s written  {r['errors']} error(s)"
+        )
+        if r["first_error"]:
+            click.echo(f"           first error: {r['first_error']}")
+
+
+# -------------------------------------------------------------------
+# flask llm-cache
+# -------------------------------------------------------------------
+
+@click.group("llm-cache")
+def llm_cache_group():
+    """Inspect and maintain the LLM response cache."""
+
+
+@llm_cache_group.command("stats")
+@with_appcontext
+def llm_cache_stats_command():
+    stats = llm_cache.stats()
+    if stats.get("error"):
+        raise click.ClickException(f"Cannot read the cache: {stats['error']}")
+    click.echo(f"{stats['entries']} entries, {stats['bytes'] / 1e6:.1f} MB")
+
+
+@llm_cache_group.command("evict")
+@click.option("--max-mb", type=float, default=None, help="Size limit (default LLM_CACHE_MAX_BYTES).")
+@click.option("--max-age-days", type=float, default=None, help="Age limit (default LLM_CACHE_MAX_AGE_DAYS).")
+@with_appcontext
+def llm_cache_evict_command(max_mb, max_age_days):
+    max_bytes = int(max_mb * 1e6) if max_mb is not None else None
+    removed = llm_cache.evict(max_bytes=max_bytes, max_age_days=max_age_days)
+    click.echo(f"Evicted {removed} entries.")
+
+
+@llm_cache_group.command("clear")
+@with_appcontext
+def llm_cache_clear_command():
+    click.echo(f"Removed {llm_cache.clear()} entries.")
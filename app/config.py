@@ -12,5 +12,64 @@ class Config:
     SQLALCHEMY_DATABASE_URI = f"sqlite:///{DB_PATH}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # SQLite storage profile, applied to every new connection (app/storage.py).
+    # WAL lets dashboard reads run while an ingest writes; NORMAL sync is
+    # durable across app crashes (only an OS crash can lose the last commits)
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    # Page cache is per connection: worst case is this times pool_size +
+    # max_overflow (20 by default, so ~320 MiB), next to the local model's RAM
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(16 * 1024)))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))    # 0 disables memory-mapped reads
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))        # wait this long for a writer's lock
+
+    # One connection per busy thread: request threads, ingest and runbook
+    # workers. Overflow covers bursts; past that, checkout waits pool_timeout
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("SQLITE_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("SQLITE_POOL_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("SQLITE_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("SQLITE_POOL_RECYCLE", "3600")),
+    }
+
+    # Background ingest: uploads are spooled here and imported by a worker pool
+    UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", BASE_DIR / "uploads"))
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+
+    # Local model served by Ollama; requests share one keep-alive pool
+    LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "llama3.2:1b")
+    OLLAMA_URL = os.getenv("OLLAMA_URL", "http://127.0.0.1:11434/api/generate")
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))    # seconds without data before giving up
+    LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))   # match OLLAMA_NUM_PARALLEL
+    LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "300"))  # wall-clock cap per prompt
+    LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", str(LLM_CONCURRENCY)))
+
+    # Runbook jobs generated in the background; each fans its batch summaries
+    # out over the LLM slots, so a few topics at a time keep them all busy
+    RUNBOOK_WORKERS = int(os.getenv("RUNBOOK_WORKERS", str(max(1, LLM_CONCURRENCY // 2))))
+    # A running background job whose owner hasn't sent a heartbeat for this
+    # long (it beats every quarter of it) is taken as abandoned and re-queued
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "120"))
+
+    # Prompt packing: num_ctx is the model's own window, capped here
+    LLM_MAX_CONTEXT_TOKENS = int(os.getenv("LLM_MAX_CONTEXT_TOKENS", "8192"))
+    LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "4096"))    # used when Ollama can't say
+
+    # Responses cached by (model, options, prompt) in their own SQLite file
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+    LLM_CACHE_PATH = Path(os.getenv("LLM_CACHE_PATH", BASE_DIR / "llm_cache.db"))
+    LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    LLM_CACHE_MAX_AGE_DAYS = float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30"))
+
+    # Rendered read pages kept in memory until ingest / generation changes them;
+    # the TTL covers writers in other processes (CLI imports), which can't signal
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") == "1"
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+
+    # Topic fallback: tickets the rules call "other" are batched to the LLM
+    LLM_TOPIC_FALLBACK = os.getenv("LLM_TOPIC_FALLBACK", "1") == "1"
+    LLM_FALLBACK_BATCH_SIZE = int(os.getenv("LLM_FALLBACK_BATCH_SIZE", "20"))
+
     # future use
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
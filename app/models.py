@@ -1,9 +1,18 @@
 # app/models.py
 from datetime import datetime
+
+from sqlalchemy import DDL, event
+
 from .extensions import db
 
 class Ticket(db.Model):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # Topic listings page newest-first on (opened_at, id)
+        db.Index("ix_tickets_topic_opened_at_id", "topic", "opened_at", "id"),
+        # Staleness: tickets of a topic changed since its runbook was built
+        db.Index("ix_tickets_topic_updated_at", "topic", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     number = db.Column(db.String(64), unique=True, index=True)
@@ -19,8 +28,17 @@ class Ticket(db.Model):
     closed_at = db.Column(db.DateTime)
 
     topic = db.Column(db.String(128), index=True)  # AI-assigned label later
+    taxonomy_version = db.Column(db.String(16))    # classifier.TAXONOMY_VERSION that set `topic`
+
+    content_hash = db.Column(db.String(40))        # fingerprint of the last ingested CSV row
+
+    # Scrubbed, truncated copies of the text that goes into prompts
+    short_description_scrubbed = db.Column(db.Text)
+    description_scrubbed = db.Column(db.Text)
+    scrub_version = db.Column(db.String(32))       # redaction.REDACTION_VERSION that produced them
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # last content change; newer than Runbook.last_updated => stale
 
 class Runbook(db.Model):
     __tablename__ = "runbooks"
@@ -31,4 +49,171 @@ class Runbook(db.Model):
     markdown = db.Column(db.Text)     # rendered final content
     json_blob = db.Column(db.Text)    # optional raw structured JSON
     tickets_used = db.Column(db.Integer)
+    input_fingerprint = db.Column(db.String(64))   # everything the model was shown; equal => skip regeneration
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
+
+class BatchSummary(db.Model):
+    __tablename__ = "batch_summaries"
+
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(128), index=True)
+    level = db.Column(db.Integer, default=0)      # 0 = ticket batch, n = merge of level n-1 summaries
+    fingerprint = db.Column(db.String(64), unique=True, index=True)  # model + prompt template + inputs
+    summary = db.Column(db.Text)
+    ticket_count = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class IngestJob(db.Model):
+    __tablename__ = "ingest_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(256))
+    path = db.Column(db.String(512))          # saved upload, removed once done
+    fingerprint = db.Column(db.String(64), index=True)  # "size:mtime_ns" of a CLI-imported file
+    status = db.Column(db.String(16), default="queued", index=True)  # queued / running / done / failed
+
+    rows_parsed = db.Column(db.Integer, default=0)
+    inserted = db.Column(db.Integer, default=0)
+    updated = db.Column(db.Integer, default=0)
+    skipped = db.Column(db.Integer, default=0)
+    unchanged = db.Column(db.Integer, default=0)
+    classified = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    owner = db.Column(db.String(64))           # "<pid>@<boot id>" of the process running it
+    heartbeat_at = db.Column(db.DateTime)      # refreshed by the owner while running
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "rows_parsed": self.rows_parsed or 0,
+            "inserted": self.inserted or 0,
+            "updated": self.updated or 0,
+            "skipped": self.skipped or 0,
+            "unchanged": self.unchanged or 0,
+            "classified": self.classified or 0,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class RunbookJob(db.Model):
+    __tablename__ = "runbook_jobs"
+    __table_args__ = (
+        # A topic's queued / running job (enqueue, claim, topic page)
+        db.Index("ix_runbook_jobs_topic_status", "topic", "status"),
+        # Recently finished jobs (ETA average, refresh-runbooks report)
+        db.Index("ix_runbook_jobs_status_finished_at", "status", "finished_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(128), index=True)
+    status = db.Column(db.String(16), default="queued", index=True)  # queued / running / done / failed / cancelled
+    priority = db.Column(db.Integer, default=0)   # tickets new or changed since the runbook was built
+    requested_by = db.Column(db.String(16))       # "user" (POST) or "scheduler"
+    runbook_id = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    owner = db.Column(db.String(64))           # "<pid>@<boot id>" of the process running it
+    heartbeat_at = db.Column(db.DateTime)      # refreshed by the owner while running
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "topic": self.topic,
+            "status": self.status,
+            "priority": self.priority or 0,
+            "requested_by": self.requested_by,
+            "runbook_id": self.runbook_id,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class TopicStat(db.Model):
+    __tablename__ = "topic_stats"
+
+    topic = db.Column(db.String(128), primary_key=True)
+    ticket_count = db.Column(db.Integer, default=0)
+    open_count = db.Column(db.Integer, default=0)
+    closed_count = db.Column(db.Integer, default=0)
+    newest_opened_at = db.Column(db.DateTime)
+    changes_since_runbook = db.Column(db.Integer, default=0)  # tickets that joined or left since the runbook was built
+
+    runbook_id = db.Column(db.Integer)
+    runbook_title = db.Column(db.String(256))
+    runbook_updated_at = db.Column(db.DateTime)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def stale(self):
+        return self.runbook_id is None or bool(self.changes_since_runbook)
+
+class TopicCache(db.Model):
+    __tablename__ = "topic_cache"
+
+    text_hash = db.Column(db.String(40), primary_key=True)  # sha1 of normalised ticket text
+    topic = db.Column(db.String(128))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# -------------------------------------------------------------------
+# Full-text search (SQLite FTS5)
+# -------------------------------------------------------------------
+# External-content indexes over the scrubbed ticket text and runbooks,
+# kept in sync by triggers so every write path (ingest executemany,
+# ensure_redacted, generation) is covered. Created with their tables on a
+# fresh database; migration 5d0f2a9c1b7e adds them to existing ones.
+
+TICKETS_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5("
+    "short_description_scrubbed, description_scrubbed, "
+    "content='tickets', content_rowid='id', tokenize='porter unicode61')",
+
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN "
+    "INSERT INTO tickets_fts (rowid, short_description_scrubbed, description_scrubbed) "
+    "VALUES (new.id, new.short_description_scrubbed, new.description_scrubbed); END",
+
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN "
+    "INSERT INTO tickets_fts (tickets_fts, rowid, short_description_scrubbed, description_scrubbed) "
+    "VALUES ('delete', old.id, old.short_description_scrubbed, old.description_scrubbed); END",
+
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_au "
+    "AFTER UPDATE OF short_description_scrubbed, description_scrubbed ON tickets BEGIN "
+    "INSERT INTO tickets_fts (tickets_fts, rowid, short_description_scrubbed, description_scrubbed) "
+    "VALUES ('delete', old.id, old.short_description_scrubbed, old.description_scrubbed); "
+    "INSERT INTO tickets_fts (rowid, short_description_scrubbed, description_scrubbed) "
+    "VALUES (new.id, new.short_description_scrubbed, new.description_scrubbed); END",
+]
+
+RUNBOOKS_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS runbooks_fts USING fts5("
+    "title, markdown, content='runbooks', content_rowid='id', tokenize='porter unicode61')",
+
+    "CREATE TRIGGER IF NOT EXISTS runbooks_fts_ai AFTER INSERT ON runbooks BEGIN "
+    "INSERT INTO runbooks_fts (rowid, title, markdown) VALUES (new.id, new.title, new.markdown); END",
+
+    "CREATE TRIGGER IF NOT EXISTS runbooks_fts_ad AFTER DELETE ON runbooks BEGIN "
+    "INSERT INTO runbooks_fts (runbooks_fts, rowid, title, markdown) "
+    "VALUES ('delete', old.id, old.title, old.markdown); END",
+
+    "CREATE TRIGGER IF NOT EXISTS runbooks_fts_au AFTER UPDATE OF title, markdown ON runbooks BEGIN "
+    "INSERT INTO runbooks_fts (runbooks_fts, rowid, title, markdown) "
+    "VALUES ('delete', old.id, old.title, old.markdown); "
+    "INSERT INTO runbooks_fts (rowid, title, markdown) VALUES (new.id, new.title, new.markdown); END",
+]
+
+for _table, _statements in ((Ticket.__table__, TICKETS_FTS_DDL), (Runbook.__table__, RUNBOOKS_FTS_DDL)):
+    for _sql in _statements:
+        event.listen(_table, "after_create", DDL(_sql).execute_if(dialect="sqlite"))
@@ -1,6 +1,8 @@
 # app/routes/health.py
 from flask import Blueprint, jsonify, current_app
 
+from ..services import llm_cache, response_cache
+
 health_bp = Blueprint("health", __name__)
 
 @health_bp.route("/")
@@ -10,5 +12,7 @@ def health():
         "ollama_running": current_app.config.get("OLLAMA_RUNNING", True),
         "model_selected": current_app.config.get("LOCAL_LLM_MODEL"),
         "ram_free_gib": round(current_app.config.get("LOCAL_FREE_RAM_GIB", 0), 2),
-        "model_ready": current_app.config.get("MODEL_READY", True)
+        "model_ready": current_app.config.get("MODEL_READY", True),
+        "llm_cache": llm_cache.stats() if llm_cache.cache_enabled() else None,
+        "response_cache": response_cache.stats(),
     })
@@ -0,0 +1,74 @@
+# app/routes/jobs.py
+import json
+import time
+
+from flask import Blueprint, Response, abort, current_app, jsonify, stream_with_context
+from ..extensions import db
+from ..models import IngestJob, RunbookJob
+from ..services.runbook_jobs import job_status as runbook_job_payload, queue_status
+
+jobs_bp = Blueprint("jobs", __name__)
+
+SSE_POLL_SECONDS = 1.0
+
+
+@jobs_bp.route("/")
+def list_jobs():
+    jobs = IngestJob.query.order_by(IngestJob.id.desc()).limit(50).all()
+    return jsonify({
+        "queued": IngestJob.query.filter_by(status="queued").count(),
+        "jobs": [j.to_dict() for j in jobs],
+    })
+
+
+@jobs_bp.route("/<int:job_id>")
+def job_status(job_id):
+    job = db.session.get(IngestJob, job_id) or abort(404)
+    return jsonify(job.to_dict())
+
+
+@jobs_bp.route("/<int:job_id>/events")
+def job_events(job_id):
+    """Server-Sent Events stream of job progress; closes when the job ends."""
+    if db.session.get(IngestJob, job_id) is None:
+        abort(404)
+
+    def _stream():
+        last = None
+        while True:
+            # End the read transaction so each poll sees the worker's commits
+            db.session.rollback()
+            payload = db.session.get(IngestJob, job_id).to_dict()
+
+            if payload != last:
+                yield f"data: {json.dumps(payload)}\n\n"
+                last = payload
+
+            if payload["status"] in ("done", "failed"):
+                return
+            time.sleep(SSE_POLL_SECONDS)
+
+    return Response(
+        stream_with_context(_stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -------------------------------------------------------------------
+# Runbook generation queue
+# -------------------------------------------------------------------
+
+@jobs_bp.route("/runbooks")
+def runbook_queue():
+    """Queue depth, running topics and an ETA, plus the latest jobs."""
+    jobs = RunbookJob.query.order_by(RunbookJob.id.desc()).limit(50).all()
+    payload = queue_status(current_app)
+    payload["jobs"] = [j.to_dict() for j in jobs]
+    return jsonify(payload)
+
+
+@jobs_bp.route("/runbooks/<int:job_id>")
+def runbook_job_status(job_id):
+    job = db.session.get(RunbookJob, job_id) or abort(404)
+    return jsonify(runbook_job_payload(current_app, job))
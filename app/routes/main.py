@@ -1,22 +1,45 @@
 # app/routes/main.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import json
+import threading
+from datetime import datetime
+
+from flask import (
+    Blueprint, render_template, request, redirect, url_for, flash, jsonify,
+    current_app, abort, Response, stream_with_context,
+)
+from sqlalchemy import tuple_
+from sqlalchemy.orm import load_only
+
 from ..extensions import db
-from ..models import Ticket, Runbook
-from ..services.snow_ingest import import_snow_csv
-from ..services.runbook_gen import assign_topics_to_tickets, generate_runbook_for_topic
+from ..models import Ticket, Runbook, IngestJob, RunbookJob, TopicStat
+from ..services.ingest_jobs import enqueue_snow_upload
+from ..services.live_runs import live_run, start_live_run
+from ..services.response_cache import cached_view
+from ..services.search import search
+from ..services.runbook_jobs import claim_topic, enqueue_runbook, run_runbook_job, stale_topics
 
 main_bp = Blueprint("main", __name__)
 
+TOPIC_PAGE_SIZE = 100
+SSE_KEEPALIVE_SECONDS = 10.0   # also how soon a closed page is noticed while the model is quiet
+
 @main_bp.route("/")
+@cached_view(lambda: {"dashboard"})
 def index():
+    # topic_stats is maintained by ingest / classification / generation,
+    # so this is a read of a few dozen rows whatever the ticket volume
     topics = (
-        db.session.query(Ticket.topic, db.func.count(Ticket.id))
-        .filter(Ticket.topic.isnot(None))
-        .group_by(Ticket.topic)
+        TopicStat.query
+        .filter(TopicStat.ticket_count > 0)
+        .order_by(TopicStat.topic)
+        .all()
+    )
+    runbooks = (
+        TopicStat.query
+        .filter(TopicStat.runbook_id.isnot(None))
+        .order_by(TopicStat.runbook_updated_at.desc())
         .all()
     )
-
-    runbooks = Runbook.query.order_by(Runbook.last_updated.desc()).all()
     return render_template("index.html", topics=topics, runbooks=runbooks)
 
 
@@ -28,60 +51,205 @@ def upload_snow():
             flash("No file uploaded", "danger")
             return redirect(request.url)
 
-        # Import SNOW CSV → returns a dict
-        result = import_snow_csv(file)
-
-        # Number of NEW tickets inserted
-        count = result["inserted"]
+        # Queue the import; parsing + classification run in the background
+        job = enqueue_snow_upload(current_app._get_current_object(), file)
 
-        flash(
-            f"Imported {result['inserted']} new tickets "
-            f"({result['updated']} updated, {result['skipped']} skipped).",
-            "success"
-        )
+        if request.accept_mimetypes.best == "application/json":
+            return jsonify({
+                "job_id": job.id,
+                "status_url": url_for("jobs.job_status", job_id=job.id),
+                "events_url": url_for("jobs.job_events", job_id=job.id),
+            }), 202
 
-        # Pull the newly added tickets
-        tickets = (
-            Ticket.query
-            .order_by(Ticket.id.desc())
-            .limit(count)
-            .all()
-        )
+        flash(f"Upload queued as ingest job #{job.id}.", "success")
+        return redirect(url_for("main.view_ingest_job", job_id=job.id))
 
-        # Assign topics to only those new tickets
-        assign_topics_to_tickets(tickets)
+    return render_template("upload_snow.html")
 
-        return redirect(url_for("main.index"))
 
-    return render_template("upload_snow.html")
+@main_bp.route("/ingest/<int:job_id>")
+def view_ingest_job(job_id):
+    job = db.session.get(IngestJob, job_id) or abort(404)
+    return render_template("ingest_job.html", job=job)
 
 
 @main_bp.route("/topic/<topic>")
+@cached_view(lambda topic: {f"topic:{topic}"})
 def view_topic(topic):
-    tickets = (
-        Ticket.query
-        .filter_by(topic=topic)
-        .order_by(Ticket.opened_at.desc())
-        .all()
-    )
+    tickets, next_cursor = _topic_page(topic, request.args.get("after"))
     runbook = Runbook.query.filter_by(topic=topic).first()
+    job = (
+        RunbookJob.query
+        .filter(RunbookJob.topic == topic, RunbookJob.status.in_(("queued", "running")))
+        .first()
+    )
 
     return render_template(
         "tickets_by_topic.html",
         topic=topic,
         tickets=tickets,
-        runbook=runbook
+        next_cursor=next_cursor,
+        runbook=runbook,
+        job=job,
     )
 
 
+def _topic_page(topic: str, cursor: str = None):
+    """
+    One page of a topic's tickets, newest first, and the cursor of the
+    next page (None on the last one).
+
+    Keyset pagination on (opened_at, id) over ix_tickets_topic_opened_at_id,
+    so every page costs the same whatever the topic size. Tickets without
+    opened_at come after all dated ones, in id order; the cursor is
+    "<opened_at iso>|<id>" or "null|<id>" for that tail. Only the listed
+    columns are loaded, never the multi-KB text fields.
+    """
+    after_ts, after_id = None, None
+    null_phase = False
+    if cursor:
+        try:
+            ts, _, ident = cursor.partition("|")
+            after_id = int(ident)
+            null_phase = ts == "null"
+            after_ts = None if null_phase else datetime.fromisoformat(ts)
+        except ValueError:
+            abort(400)
+
+    base = (
+        Ticket.query
+        .options(load_only(Ticket.id, Ticket.number, Ticket.short_description, Ticket.opened_at))
+        .filter(Ticket.topic == topic)
+    )
+
+    rows = []
+    if not null_phase:
+        dated = base.filter(Ticket.opened_at.isnot(None))
+        if after_ts is not None:
+            dated = dated.filter(tuple_(Ticket.opened_at, Ticket.id) < (after_ts, after_id))
+        rows = dated.order_by(Ticket.opened_at.desc(), Ticket.id.desc()).limit(TOPIC_PAGE_SIZE + 1).all()
+
+    if len(rows) <= TOPIC_PAGE_SIZE:
+        # Dated tickets ran out on this page: continue into the undated ones
+        undated = base.filter(Ticket.opened_at.is_(None))
+        if null_phase:
+            undated = undated.filter(Ticket.id < after_id)
+        rows += undated.order_by(Ticket.id.desc()).limit(TOPIC_PAGE_SIZE + 1 - len(rows)).all()
+
+    if len(rows) <= TOPIC_PAGE_SIZE:
+        return rows, None
+
+    rows = rows[:TOPIC_PAGE_SIZE]
+    last = rows[-1]
+    ts = last.opened_at.isoformat() if last.opened_at else "null"
+    return rows, f"{ts}|{last.id}"
+
+
 @main_bp.route("/topic/<topic>/generate", methods=["POST"])
 def generate_runbook(topic):
-    rb = generate_runbook_for_topic(topic)
-    flash(f"Runbook for topic '{topic}' generated/updated.", "success")
-    return redirect(url_for("main.view_runbook", runbook_id=rb.id))
+    # Queue the generation; the LLM pipeline runs in the runbook worker pool
+    job = enqueue_runbook(
+        current_app._get_current_object(),
+        topic,
+        priority=stale_topics(topic).get(topic, 0),
+        requested_by="user",
+    )
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "job_id": job.id,
+            "status_url": url_for("jobs.runbook_job_status", job_id=job.id),
+        }), 202
+
+    flash(f"Runbook for topic '{topic}' queued as job #{job.id}.", "success")
+    return redirect(url_for("main.view_topic", topic=topic))
+
+
+@main_bp.route("/topic/<topic>/generate/stream")
+def generate_runbook_stream(topic):
+    """
+    Generate a topic's runbook while the browser watches: Server-Sent
+    Events for each pipeline stage, then the runbook text token by token
+    as the model writes it, then a final done / failed / cancelled event.
+
+    A topic already generating live in this process is attached to, not
+    started again: the stream replays its events (after Last-Event-ID on a
+    reconnect) and follows on. Once no page has watched it for a short
+    grace period, the generation in flight is cancelled.
+    """
+    run = live_run(topic)
+    if run is None:
+        job = claim_topic(topic)
+        # Lost the claim to a request that is just starting its run: watch that
+        run = start_live_run(job.id, topic) if job is not None else live_run(topic)
+        if run is None:
+            busy = RunbookJob.query.filter_by(topic=topic, status="running").first()
+            payload = {"stage": "busy", "job_id": busy.id if busy else None}
+            return Response(f"data: {json.dumps(payload)}\n\n", mimetype="text/event-stream")
+
+        if job is not None:
+            _start_live_generation(current_app._get_current_object(), run)
+
+    # A reconnecting EventSource resumes after the last event it saw
+    after = request.headers.get("Last-Event-ID", 0, type=int)
+
+    def _stream():
+        for event_id, event in run.follow(after, keepalive=SSE_KEEPALIVE_SECONDS):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            if event.get("runbook_id"):
+                event = dict(event, url=url_for("main.view_runbook", runbook_id=event["runbook_id"]))
+            yield f"id: {event_id}\ndata: {json.dumps(event)}\n\n"
+
+    return Response(
+        stream_with_context(_stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _start_live_generation(app, run):
+    def _generate():
+        with app.app_context():
+            try:
+                finished = run_runbook_job(run.job_id, cancel=run.cancel, on_event=run.publish)
+                run.publish({
+                    "stage": finished.status,
+                    "job_id": run.job_id,
+                    "runbook_id": finished.runbook_id,
+                    "error": finished.error,
+                })
+            except Exception as e:
+                print(f"Runbook job {run.job_id} ({run.topic}) stream failed:", e)
+                run.publish({"stage": "failed", "job_id": run.job_id, "error": str(e)})
+            finally:
+                db.session.remove()
+                run.publish(None)
+
+    threading.Thread(target=_generate, name=f"runbook-stream-{run.job_id}", daemon=True).start()
+
+
+@main_bp.route("/search")
+def search_view():
+    """Ranked full-text search; JSON for clients that ask for it."""
+    kind = request.args.get("kind", "tickets")
+    if kind not in ("tickets", "runbooks"):
+        abort(400)
+    page = request.args.get("page", 1, type=int)
+    results = search(request.args.get("q", ""), kind=kind, page=page)
+
+    if request.accept_mimetypes.best == "application/json":
+        for r in results["results"]:
+            del r["highlight"]
+            r.update({k: v.isoformat() for k, v in r.items() if isinstance(v, datetime)})
+        return jsonify(results)
+
+    return render_template("search.html", **results)
 
 
 @main_bp.route("/runbook/<int:runbook_id>")
+@cached_view(lambda runbook_id: {f"runbook:{runbook_id}"})
 def view_runbook(runbook_id):
     rb = Runbook.query.get_or_404(runbook_id)
     return render_template("runbook_view.html", runbook=rb)
@@ -1,38 +1,155 @@
 # app/services/ai_client.py
+import json
+import os
+import threading
+
 import requests
 from flask import current_app
+from requests.adapters import HTTPAdapter
+
+from . import llm_cache
 
 OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
 
+# One keep-alive connection pool per process, shared by every caller
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_context_lengths = {}   # model -> context window reported by Ollama
+
+
+def _get_session() -> requests.Session:
+    global _session, _session_pid
+
+    with _session_lock:
+        # A forked worker must not reuse the parent's sockets
+        if _session is None or _session_pid != os.getpid():
+            pool_size = current_app.config.get("LLM_POOL_SIZE", 4)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
 
-def call_llm(prompt: str) -> str:
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+            _session, _session_pid = session, os.getpid()
+
+    return _session
+
+
+def stream_llm(prompt: str, model: str = None, options: dict = None, cancel=None, use_cache: bool = True):
     """
-    Call the locally-selected Ollama model.
+    Yield response text from the Ollama model as it is generated.
+
+    The NDJSON stream is consumed line by line as it arrives, so the first
+    token reaches the caller without waiting for the rest. `options` is
+    passed through as Ollama generation options (num_ctx, temperature, ...).
+    If `cancel` (a threading.Event) is set, the stream is abandoned at the
+    next line and the generator simply ends; if it is already set, nothing
+    is sent to the model at all.
+
+    Responses are served from / saved to llm_cache unless `use_cache` is
+    False or LLM_CACHE_ENABLED is off. A hit is yielded as one chunk; only
+    streams read to the end are stored, never cancelled or failed ones.
+
+    Transport and protocol errors are raised (requests.RequestException,
+    ValueError); call_llm is the non-raising wrapper.
     """
-    model = current_app.config.get("LOCAL_LLM_MODEL", "llama3.2:1b")
+    if cancel is not None and cancel.is_set():
+        return
 
-    try:
-        resp = requests.post(
-            OLLAMA_URL,
-            json={"model": model, "prompt": prompt},
-            timeout=20,
-        )
+    model = model or current_app.config.get("LOCAL_LLM_MODEL", "llama3.2:1b")
+
+    key = None
+    if use_cache and llm_cache.cache_enabled():
+        key = llm_cache.cache_key(model, options, prompt)
+        cached = llm_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    payload = {"model": model, "prompt": prompt, "stream": True}
+    if options:
+        payload["options"] = options
+
+    url = current_app.config.get("OLLAMA_URL", OLLAMA_URL)
+    timeout = current_app.config.get("LLM_TIMEOUT", 20)
+
+    parts = []
+    with _get_session().post(url, json=payload, timeout=timeout, stream=True) as resp:
         resp.raise_for_status()
-    except Exception as e:
-        print("LLM request failed:", e)
-        return "UNKNOWN"
 
-    # Ollama returns a streaming-like sequence of JSON objects.
-    text = ""
-    try:
-        for line in resp.text.splitlines():
-            if not line.strip():
+        # chunk_size=None hands over each chunk as soon as it is received
+        for line in resp.iter_lines(chunk_size=None):
+            if cancel is not None and cancel.is_set():
+                return
+            if not line:
                 continue
-            import json
+
             part = json.loads(line)
-            text += part.get("response", "")
-    except Exception as e:
+            if part.get("error"):
+                raise ValueError(f"Ollama error: {part['error']}")
+
+            # Read on past the final "done" object: a fully consumed body is
+            # what lets the connection go back to the pool
+            token = part.get("response")
+            if token:
+                parts.append(token)
+                yield token
+
+    if key is not None and parts:
+        llm_cache.put(key, model, "".join(parts))
+
+
+def call_llm(prompt: str, model: str = None, options: dict = None, use_cache: bool = True,
+             cancel=None, on_token=None) -> str:
+    """
+    Call the locally-selected Ollama model.
+
+    Returns the whole response, or "UNKNOWN" if the model could not be
+    reached, answered with something unparseable, or `cancel` was set
+    before it finished. `on_token(text)` sees each chunk as it arrives.
+    """
+    parts = []
+    try:
+        for token in stream_llm(prompt, model=model, options=options, cancel=cancel, use_cache=use_cache):
+            parts.append(token)
+            if on_token is not None:
+                on_token(token)
+    except requests.RequestException as e:
+        print("LLM request failed:", e)
+        return "UNKNOWN"
+    except ValueError as e:
         print("LLM parse error:", e)
         return "UNKNOWN"
 
-    return text.strip()
+    if cancel is not None and cancel.is_set():
+        return "UNKNOWN"
+
+    return "".join(parts).strip()
+
+
+def model_context_length(model: str = None):
+    """
+    Context window (tokens) the model was trained for, from Ollama's
+    /api/show, or None if Ollama cannot tell us. Cached per model.
+    """
+    model = model or current_app.config.get("LOCAL_LLM_MODEL", "llama3.2:1b")
+    if model in _context_lengths:
+        return _context_lengths[model]
+
+    generate_url = current_app.config.get("OLLAMA_URL", OLLAMA_URL)
+    show_url = generate_url.rsplit("/api/", 1)[0] + "/api/show"
+
+    try:
+        resp = _get_session().post(show_url, json={"model": model}, timeout=current_app.config.get("LLM_TIMEOUT", 20))
+        resp.raise_for_status()
+        info = resp.json().get("model_info") or {}
+    except (requests.RequestException, ValueError) as e:
+        print("LLM model info unavailable:", e)
+        return None   # not cached: Ollama may simply not be up yet
+
+    # Key is "<architecture>.context_length", e.g. "llama.context_length"
+    length = next((v for k, v in info.items() if k.endswith(".context_length")), None)
+    _context_lengths[model] = int(length) if length else None
+    return _context_lengths[model]
@@ -1,4 +1,6 @@
 # app/services/classifier.py
+import hashlib
+import json
 import re
 
 
@@ -72,6 +74,40 @@ TAXONOMY = {
 }
 
 
+# Content-derived: changes whenever a topic, pattern or their order changes.
+# Stored on each Ticket so bulk reclassification only revisits stale rows.
+TAXONOMY_VERSION = hashlib.sha1(
+    json.dumps(list(TAXONOMY.items())).encode("utf-8")
+).hexdigest()[:12]
+
+
+# ----------------------------------------------------
+#  COMPILED MATCHER
+# ----------------------------------------------------
+_REGEX_META = set(".^$*+?{}[]\\|()")
+
+
+def _compile_taxonomy(taxonomy):
+    """
+    Compile TAXONOMY once into an ordered list of (topic, literals, regex).
+
+    Plain keywords are checked with substring search (C fast-search, no
+    regex machinery); the few real patterns of a topic are folded into one
+    compiled alternation. Topic order is preserved, so the first topic
+    with any hit wins exactly as before.
+    """
+    compiled = []
+    for topic, patterns in taxonomy.items():
+        literals = tuple(p for p in patterns if not _REGEX_META.intersection(p))
+        regexes = [p for p in patterns if _REGEX_META.intersection(p)]
+        regex = re.compile("|".join(f"(?:{p})" for p in regexes)) if regexes else None
+        compiled.append((topic, literals, regex))
+    return compiled
+
+
+_MATCHER = _compile_taxonomy(TAXONOMY)
+
+
 # ----------------------------------------------------
 #  NORMALIZER
 # ----------------------------------------------------
@@ -90,22 +126,40 @@ def classify_ticket(ticket):
     No LLM unless everything fails.
     """
 
-    text = " ".join([
-        _norm(ticket.short_description),
-        _norm(ticket.description),
-        _norm(ticket.category),
-        _norm(ticket.subcategory),
-        _norm(ticket.assignment_group),
-        _norm(ticket.ci),
-    ])
+    return classify_text(_ticket_text(ticket))
+
+
+def classify_many(tickets) -> list[str]:
+    """Classify a batch of tickets; returns topics in input order."""
+    return [classify_text(_ticket_text(t)) for t in tickets]
 
+
+def classify_text(text: str) -> str:
+    """Topic for already-normalised (lower-cased) ticket text."""
     if not text.strip():
         return "other"
 
-    # Pattern match by topic
-    for topic, patterns in TAXONOMY.items():
-        for p in patterns:
-            if re.search(p, text):
+    for topic, literals, regex in _MATCHER:
+        for kw in literals:
+            if kw in text:
                 return topic
+        if regex is not None and regex.search(text):
+            return topic
 
     return "other"
+
+
+def text_fingerprint(text: str) -> str:
+    """Whitespace-insensitive hash of normalised ticket text (LLM fallback cache key)."""
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _ticket_text(ticket) -> str:
+    return " ".join([
+        _norm(ticket.short_description),
+        _norm(ticket.description),
+        _norm(ticket.category),
+        _norm(ticket.subcategory),
+        _norm(ticket.assignment_group),
+        _norm(ticket.ci),
+    ])
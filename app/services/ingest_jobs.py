@@ -0,0 +1,174 @@
+# app/services/ingest_jobs.py
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from ..extensions import db
+from ..models import IngestJob, Ticket
+from .job_leases import abandoned_jobs, claim_values, job_lease
+from .runbook_gen import assign_topics_to_tickets
+from .snow_ingest import import_snow_csv
+
+CLASSIFY_CHUNK_SIZE = 1000    # tickets classified per commit after import
+
+_executor = None
+
+
+def _get_executor(app):
+    """One process-wide pool; INGEST_WORKERS bounds concurrent imports."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=app.config.get("INGEST_WORKERS", 1),
+            thread_name_prefix="snow-ingest",
+        )
+    return _executor
+
+
+# -------------------------------------------------------------------
+# Enqueue
+# -------------------------------------------------------------------
+
+def enqueue_snow_upload(app, file_storage) -> IngestJob:
+    """
+    Spool an uploaded SNOW export to disk, record a queued job and hand it
+    to the worker pool. Returns immediately with the persisted job.
+    """
+    upload_dir = Path(app.config["UPLOAD_DIR"])
+    upload_dir.mkdir(parents=True, exist_ok=True)
+
+    path = upload_dir / f"{uuid.uuid4().hex}.csv"
+    file_storage.save(path)
+
+    job = IngestJob(filename=file_storage.filename, path=str(path), status="queued")
+    db.session.add(job)
+    db.session.commit()
+
+    _get_executor(app).submit(_run_ingest_job, app, job.id)
+
+    # Pick up anything a dead process left behind while we're at it
+    for job_id in reap_ingest_jobs(app):
+        _get_executor(app).submit(_run_ingest_job, app, job_id)
+    return job
+
+
+def reap_ingest_jobs(app) -> list[int]:
+    """
+    Release jobs left "running" by a process that is gone: those whose
+    lease has expired or whose owner has exited (see job_leases). Each is
+    re-queued while its spooled file is still there (re-importing is
+    idempotent) and marked failed otherwise. Returns the re-queued ids.
+    """
+    requeued = []
+    for job in abandoned_jobs(app, IngestJob):
+        if job.path and os.path.exists(job.path):
+            job.status = "queued"
+            job.started_at = None
+            job.owner = None
+            job.heartbeat_at = None
+            requeued.append(job.id)
+        else:
+            job.status = "failed"
+            job.error = "Interrupted; the uploaded file is gone"
+            job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return requeued
+
+
+def resume_ingest_jobs(app) -> int:
+    """
+    Hand this process's pool the jobs nobody is working on.
+
+    The pool only lives in memory, so after a restart queued jobs would
+    wait forever and interrupted ones would never finish. Abandoned jobs
+    are reaped first; jobs live sibling processes are running keep their
+    lease. Every queued job is submitted, as claiming is atomic and a job
+    another pool also holds simply runs once. Returns how many were queued.
+    """
+    reap_ingest_jobs(app)
+
+    queued = [job.id for job in IngestJob.query.filter_by(status="queued").order_by(IngestJob.id)]
+    for job_id in queued:
+        _get_executor(app).submit(_run_ingest_job, app, job_id)
+    return len(queued)
+
+
+# -------------------------------------------------------------------
+# Worker
+# -------------------------------------------------------------------
+
+def _run_ingest_job(app, job_id: int):
+    with app.app_context():
+        # Atomically claim the job so a job is never run twice
+        claimed = (
+            IngestJob.query
+            .filter_by(id=job_id, status="queued")
+            .update({"status": "running", "started_at": datetime.utcnow(), **claim_values()})
+        )
+        db.session.commit()
+        if not claimed:
+            return
+
+        job = db.session.get(IngestJob, job_id)
+
+        try:
+            with job_lease(app, IngestJob, job_id):
+                with open(job.path, "rb") as fh:
+                    import_snow_csv(fh, on_progress=lambda stats: record_job_progress(job, stats))
+
+                classify_unassigned_tickets(job)
+
+            job.status = "done"
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+            os.remove(job.path)
+
+        except Exception as e:
+            print(f"Ingest job {job_id} failed:", e)
+            db.session.rollback()
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+        finally:
+            db.session.remove()
+
+
+def record_job_progress(job: IngestJob, stats: dict):
+    """Persist the ingest counters reported after each committed chunk."""
+    job.rows_parsed = stats["rows"]
+    job.inserted = stats["inserted"]
+    job.updated = stats["updated"]
+    job.skipped = stats["skipped"]
+    job.unchanged = stats["unchanged"]
+    db.session.commit()
+
+
+def classify_unassigned_tickets(job: IngestJob = None) -> int:
+    """Assign topics to every not-yet-classified ticket, chunk by chunk."""
+    classified = 0
+    last_id = 0
+    while True:
+        batch = (
+            Ticket.query
+            .filter(Ticket.topic.is_(None), Ticket.id > last_id)
+            .order_by(Ticket.id)
+            .limit(CLASSIFY_CHUNK_SIZE)
+            .all()
+        )
+        if not batch:
+            break
+
+        last_id = batch[-1].id
+        assign_topics_to_tickets(batch)
+        classified += len(batch)
+
+        if job is not None:
+            job.classified = (job.classified or 0) + len(batch)
+            db.session.commit()
+
+    return classified
@@ -0,0 +1,105 @@
+# app/services/job_leases.py
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from ..extensions import db
+
+# Leases on claimed background jobs (ingest and runbook). A claim records
+# which process owns the job ("<pid>@<boot id>") and a heartbeat that the
+# owner refreshes while the job runs. A "running" job is abandoned, and
+# may be released by any process, once its heartbeat is older than
+# JOB_LEASE_SECONDS or its owner process is gone. Other processes' live
+# jobs are never touched, whether they started before or after this one.
+
+_BOOT_ID_PATH = Path("/proc/sys/kernel/random/boot_id")
+
+
+def _read_boot_id() -> str:
+    try:
+        return _BOOT_ID_PATH.read_text().strip()
+    except OSError:
+        return ""
+
+
+_BOOT_ID = _read_boot_id()
+
+
+def owner_id() -> str:
+    return f"{os.getpid()}@{_BOOT_ID}"
+
+
+def job_lease_seconds(app) -> float:
+    """Seconds without a heartbeat before a running job is taken as abandoned."""
+    return app.config.get("JOB_LEASE_SECONDS", 120)
+
+
+def claim_values() -> dict:
+    """Columns to set on the job when this process claims it."""
+    return {"owner": owner_id(), "heartbeat_at": datetime.utcnow()}
+
+
+def _owner_alive(owner: str) -> bool:
+    """
+    False only when the owner is known to be gone: another boot of this
+    machine, or no process with that pid. Unknown owners (no boot id to
+    compare, non-POSIX) are left to the heartbeat.
+    """
+    pid, _, boot = (owner or "").partition("@")
+    if not boot or not _BOOT_ID or os.name != "posix":
+        return True
+    if boot != _BOOT_ID:
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+def abandoned_jobs(app, model) -> list:
+    """Running jobs of `model` whose lease has expired or whose owner is gone."""
+    cutoff = datetime.utcnow() - timedelta(seconds=job_lease_seconds(app))
+    abandoned = []
+    for job in model.query.filter_by(status="running").all():
+        last_seen = job.heartbeat_at or job.started_at
+        if last_seen is None or last_seen < cutoff or not _owner_alive(job.owner):
+            abandoned.append(job)
+    return abandoned
+
+
+@contextmanager
+def job_lease(app, model, job_id: int):
+    """Keep a claimed job's heartbeat fresh for as long as the block runs."""
+    stop = threading.Event()
+    beat = threading.Thread(
+        target=_heartbeat, args=(app, model, job_id, stop),
+        name=f"{model.__tablename__}-{job_id}-lease", daemon=True,
+    )
+    beat.start()
+    try:
+        yield
+    finally:
+        stop.set()
+
+
+def _heartbeat(app, model, job_id: int, stop):
+    interval = job_lease_seconds(app) / 4
+    with app.app_context():
+        try:
+            while not stop.wait(interval):
+                try:
+                    model.query.filter_by(id=job_id, status="running", owner=owner_id()).update(
+                        {"heartbeat_at": datetime.utcnow()}
+                    )
+                    db.session.commit()
+                except Exception as e:
+                    # A missed beat is retried; the lease allows for several
+                    print(f"Heartbeat for {model.__tablename__} {job_id} failed:", e)
+                    db.session.rollback()
+        finally:
+            db.session.remove()
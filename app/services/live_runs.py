@@ -0,0 +1,99 @@
+# app/services/live_runs.py
+import threading
+
+# Runbook generations watched live over SSE, by topic. A run keeps every
+# event it has published, numbered from 1, so a browser that reconnects
+# (Last-Event-ID) or a second tab replays what it missed and follows on
+# instead of claiming the topic again. A run is cancelled only once nobody
+# has watched it for REATTACH_GRACE_SECONDS, and a finished run stays
+# attachable that long too, so a late reconnect sees its final event.
+
+REATTACH_GRACE_SECONDS = 15.0
+
+_runs = {}                   # topic -> LiveRun
+_runs_lock = threading.Lock()
+
+
+class LiveRun:
+    def __init__(self, job_id: int, topic: str):
+        self.job_id = job_id
+        self.topic = topic
+        self.cancel = threading.Event()
+        self.events = []
+        self.finished = False
+        self._watchers = 0
+        self._cond = threading.Condition()
+
+    def publish(self, event):
+        """Append an event; None marks the end of the run."""
+        with self._cond:
+            if event is None:
+                self.finished = True
+            else:
+                self.events.append(event)
+            self._cond.notify_all()
+
+        if event is None:
+            _later(_forget, self)
+
+    def follow(self, after: int = 0, keepalive: float = 10.0):
+        """
+        Yield (event id, event) for events after id `after`, waiting for new
+        ones until the run ends; (None, None) when `keepalive` seconds pass
+        without one.
+        """
+        with self._cond:
+            self._watchers += 1
+        try:
+            while True:
+                with self._cond:
+                    if len(self.events) <= after and not self.finished:
+                        self._cond.wait(keepalive)
+                    pending = self.events[after:]
+                    finished = self.finished
+
+                if pending:
+                    for event in pending:
+                        after += 1
+                        yield after, event
+                elif finished:
+                    return
+                else:
+                    yield None, None
+        finally:
+            with self._cond:
+                self._watchers -= 1
+                unwatched = self._watchers == 0 and not self.finished
+            if unwatched:
+                _later(self._cancel_if_unwatched)
+
+    def _cancel_if_unwatched(self):
+        with self._cond:
+            if self._watchers == 0 and not self.finished:
+                self.cancel.set()
+
+
+def live_run(topic: str):
+    """The topic's live run in this process (running or just finished), or None."""
+    with _runs_lock:
+        return _runs.get(topic)
+
+
+def start_live_run(job_id: int, topic: str) -> LiveRun:
+    """Register a live run for a job this process has just claimed."""
+    run = LiveRun(job_id, topic)
+    with _runs_lock:
+        _runs[topic] = run
+    return run
+
+
+def _later(fn, *args):
+    timer = threading.Timer(REATTACH_GRACE_SECONDS, fn, args=args)
+    timer.daemon = True
+    timer.start()
+
+
+def _forget(run: LiveRun):
+    with _runs_lock:
+        if _runs.get(run.topic) is run:
+            del _runs[run.topic]
@@ -0,0 +1,176 @@
+# app/services/llm_cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+
+# Content-addressed cache of LLM responses. Entries are keyed by sha256 of
+# (model, options, prompt) and live in their own SQLite file
+# (LLM_CACHE_PATH), apart from the app database, so cache traffic from LLM
+# worker threads never contends with ingest writes.
+
+EVICT_EVERY_PUTS = 50       # eviction pass frequency
+
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evicted": 0}
+_stats_lock = threading.Lock()
+_puts_since_evict = 0
+_ready_paths = set()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key        TEXT PRIMARY KEY,
+    model      TEXT,
+    response   TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used);
+"""
+
+
+def cache_key(model: str, options: dict, prompt: str) -> str:
+    blob = json.dumps([model, options or {}, prompt], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def cache_enabled() -> bool:
+    return bool(current_app.config.get("LLM_CACHE_ENABLED", True))
+
+
+def get(key: str):
+    """Cached response for `key`, or None. Counts a hit or a miss."""
+    try:
+        with _connect() as conn:
+            row = conn.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+    except sqlite3.Error as e:
+        # A broken cache must never stop a generation; treat it as a miss
+        print("LLM cache read failed:", e)
+        row = None
+
+    _count("hits" if row is not None else "misses")
+    return row[0] if row is not None else None
+
+
+def put(key: str, model: str, response: str) -> None:
+    """Store a complete response; every EVICT_EVERY_PUTS stores, run eviction."""
+    global _puts_since_evict
+
+    now = time.time()
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, response, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now),
+            )
+    except sqlite3.Error as e:
+        print("LLM cache write failed:", e)
+        return
+    _count("stores")
+
+    with _stats_lock:
+        _puts_since_evict += 1
+        due = _puts_since_evict >= EVICT_EVERY_PUTS
+        if due:
+            _puts_since_evict = 0
+    if due:
+        evict()
+
+
+def evict(max_bytes: int = None, max_age_days: float = None) -> int:
+    """
+    Drop entries older than max_age_days, then least-recently-used entries
+    until the stored responses fit in max_bytes. Defaults come from
+    LLM_CACHE_MAX_BYTES / LLM_CACHE_MAX_AGE_DAYS. Returns rows removed.
+    """
+    cfg = current_app.config
+    if max_bytes is None:
+        max_bytes = cfg.get("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+    if max_age_days is None:
+        max_age_days = cfg.get("LLM_CACHE_MAX_AGE_DAYS", 30)
+
+    removed = 0
+    try:
+        with _connect() as conn:
+            cutoff = time.time() - max_age_days * 86400
+            removed += conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (cutoff,)).rowcount
+
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            if total > max_bytes:
+                # Walk from least recently used, summing until enough is freed
+                excess = total - max_bytes
+                cutoff_used = None
+                for last_used, size in conn.execute("SELECT last_used, size FROM llm_cache ORDER BY last_used"):
+                    excess -= size
+                    cutoff_used = last_used
+                    if excess <= 0:
+                        break
+                removed += conn.execute("DELETE FROM llm_cache WHERE last_used <= ?", (cutoff_used,)).rowcount
+    except sqlite3.Error as e:
+        # Runs from put(), inside a generation; try again on a later pass
+        print("LLM cache eviction failed:", e)
+        return 0
+
+    _count("evicted", removed)
+    return removed
+
+
+def stats() -> dict:
+    """
+    Process-local hit/miss counters plus the current size of the cache
+    (entries / bytes are None, with an "error", if the file can't be read).
+    """
+    entries = size = error = None
+    try:
+        with _connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+    except sqlite3.Error as e:
+        print("LLM cache stats failed:", e)
+        error = str(e)
+
+    with _stats_lock:
+        counters = dict(_stats)
+
+    lookups = counters["hits"] + counters["misses"]
+    counters.update(
+        entries=entries,
+        bytes=size,
+        hit_rate=round(counters["hits"] / lookups, 3) if lookups else None,
+    )
+    if error is not None:
+        counters["error"] = error
+    return counters
+
+
+def clear() -> int:
+    with _connect() as conn:
+        return conn.execute("DELETE FROM llm_cache").rowcount
+
+
+def _count(name: str, n: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += n
+
+
+@contextmanager
+def _connect():
+    """A short-lived connection per operation (so safe from any thread), committed on success."""
+    path = str(current_app.config["LLM_CACHE_PATH"])
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        if path not in _ready_paths:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _ready_paths.add(path)
+
+        with conn:
+            yield conn
+    finally:
+        conn.close()
@@ -0,0 +1,89 @@
+# app/services/llm_executor.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from flask import current_app
+
+from .ai_client import stream_llm
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app):
+    """One process-wide pool; LLM_CONCURRENCY bounds prompts in flight to Ollama."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get("LLM_CONCURRENCY", 4),
+                thread_name_prefix="llm",
+            )
+    return _executor
+
+
+def map_llm(prompts: list[str], timeout: float = None, cancel=None, on_done=None, **llm_kwargs) -> list[str]:
+    """
+    Run a list of prompts concurrently; answers come back in prompt order.
+
+    Same contract as call_llm for each prompt: the stripped response text,
+    or "UNKNOWN" if that call failed, took longer than `timeout` seconds
+    (default LLM_CALL_TIMEOUT), or was cancelled. Setting `cancel` (a
+    threading.Event) drops prompts that have not started and stops running
+    ones at their next token. `on_done(finished, total)` is called in the
+    caller's thread as each prompt completes, in completion order. Extra
+    keyword arguments go to stream_llm.
+    """
+    if not prompts:
+        return []
+
+    app = current_app._get_current_object()
+    if timeout is None:
+        timeout = app.config.get("LLM_CALL_TIMEOUT", 300)
+    cancel = cancel or threading.Event()
+
+    pool = _get_executor(app)
+    futures = [
+        pool.submit(_run_prompt, app, prompt, timeout, cancel, llm_kwargs)
+        for prompt in prompts
+    ]
+
+    try:
+        if on_done is not None:
+            for finished, _ in enumerate(as_completed(futures), 1):
+                on_done(finished, len(futures))
+        return [future.result() for future in futures]
+    finally:
+        # No-op once every call is done; if we are interrupted part way,
+        # prompts that have not started yet are dropped
+        for future in futures:
+            future.cancel()
+
+
+def _run_prompt(app, prompt: str, timeout: float, cancel, llm_kwargs) -> str:
+    if cancel.is_set():
+        return "UNKNOWN"
+
+    deadline = time.monotonic() + timeout
+    parts = []
+
+    with app.app_context():
+        try:
+            for token in stream_llm(prompt, cancel=cancel, **llm_kwargs):
+                parts.append(token)
+                if time.monotonic() > deadline:
+                    print(f"LLM call exceeded {timeout:g}s, abandoned")
+                    return "UNKNOWN"
+        except requests.RequestException as e:
+            print("LLM request failed:", e)
+            return "UNKNOWN"
+        except ValueError as e:
+            print("LLM parse error:", e)
+            return "UNKNOWN"
+
+    if cancel.is_set():
+        return "UNKNOWN"
+
+    return "".join(parts).strip()
@@ -1,4 +1,5 @@
 # app/services/phi_scrub.py
+import hashlib
 import re
 
 # Basic PHI/PII detection patterns
@@ -11,17 +12,110 @@ MRN_RE = re.compile(r"\b(?:MRN[:\s]*\d+|\d{7,10})\b", re.IGNORECASE)
 # VERY conservative "looks like a name" pattern
 NAME_LIKE_RE = re.compile(r"\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)\b")
 
+# Redaction passes, in the order they have always been applied
+SCRUB_PASSES = (
+    (EMAIL_RE, "<REDACTED_EMAIL>"),
+    (PHONE_RE, "<REDACTED_PHONE>"),
+    (SSN_RE, "<REDACTED_SSN>"),
+    (DOB_RE, "<REDACTED_DOB>"),
+    (MRN_RE, "<REDACTED_MRN>"),
+    (NAME_LIKE_RE, "<REDACTED_NAME>"),
+)
+
+# Changes whenever a pattern or replacement changes; persisted redactions
+# carry it so they can be recomputed when the rules move.
+SCRUBBER_VERSION = hashlib.sha1(
+    repr([(rx.pattern, rx.flags, token) for rx, token in SCRUB_PASSES]).encode("utf-8")
+).hexdigest()[:12]
+
+# Cheap necessary conditions used to skip passes that cannot match
+_DIGIT_RE = re.compile(r"\d")
+
+# Candidate start positions for the passes that begin with \b. Those leading
+# \b assertions stop re from using its fast prefix scan, so the full pattern
+# is attempted at every word boundary. Instead we let these simpler regexes
+# (which do get the fast scan) find the only places a match can begin, and
+# try the real pattern there.
+#   - digit-led patterns can only start at the first digit of a run, so a
+#     failed run is skipped whole;
+#   - every name starts where _NAME_START_RE matches, possibly on its
+#     second word, so a failed candidate only advances one character.
+_PHONE_START_RE = re.compile(r"\d+|[+(]")
+_DIGITS_START_RE = re.compile(r"\d+")
+_MRN_START_RE = re.compile(r"\d+|[Mm][Rr][Nn]")
+_NAME_START_RE = re.compile(r"[A-Z][a-z]+\s+[A-Z][a-z]")
+
 
 def scrub_text(text: str) -> str:
     """Redact obvious PHI/PII before sending to the model."""
     if not text:
         return text
 
-    text = EMAIL_RE.sub("<REDACTED_EMAIL>", text)
-    text = PHONE_RE.sub("<REDACTED_PHONE>", text)
-    text = SSN_RE.sub("<REDACTED_SSN>", text)
-    text = DOB_RE.sub("<REDACTED_DOB>", text)
-    text = MRN_RE.sub("<REDACTED_MRN>", text)
-    text = NAME_LIKE_RE.sub("<REDACTED_NAME>", text)
+    # Same passes, same order and same matches as _scrub_sequential; passes
+    # are skipped only when the text cannot contain a match for them.
+    if "@" in text:
+        text = EMAIL_RE.sub("<REDACTED_EMAIL>", text)
+
+    if _DIGIT_RE.search(text):
+        text = _sub_at(text, PHONE_RE, _PHONE_START_RE, "<REDACTED_PHONE>")
+        if "-" in text:
+            text = _sub_at(text, SSN_RE, _DIGITS_START_RE, "<REDACTED_SSN>")
+        if "/" in text or "-" in text:
+            text = _sub_at(text, DOB_RE, _DIGITS_START_RE, "<REDACTED_DOB>")
+        text = _sub_at(text, MRN_RE, _MRN_START_RE, "<REDACTED_MRN>")
+
+    return _sub_at(text, NAME_LIKE_RE, _NAME_START_RE, "<REDACTED_NAME>", skip_candidate=False)
+
+
+def scrub_many(texts) -> list:
+    """Scrub a batch of strings; repeated strings are only scrubbed once."""
+    done = {}
+    out = []
+    for text in texts:
+        if text not in done:
+            done[text] = scrub_text(text)
+        out.append(done[text])
+    return out
+
+
+def _sub_at(text: str, rx, start_rx, token: str, skip_candidate: bool = True) -> str:
+    """
+    rx.sub(token, text), trying rx only where start_rx finds a candidate.
+
+    Equivalent to re.sub because every rx match begins at a start_rx
+    match, and candidates are visited left to right exactly as sub's own
+    scan would. match() at a position still sees the preceding character,
+    so the leading \b behaves as in a full-string search.
+    """
+    cand = start_rx.search(text)
+    if cand is None:
+        return text
+
+    parts = []
+    last = 0
+    while cand is not None:
+        m = rx.match(text, cand.start())
+        if m:
+            parts.append(text[last:m.start()])
+            parts.append(token)
+            last = m.end()
+            cand = start_rx.search(text, last)
+        else:
+            cand = start_rx.search(text, cand.end() if skip_candidate else cand.start() + 1)
+
+    if not parts:
+        return text
+
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def _scrub_sequential(text: str) -> str:
+    """Reference implementation: every pass over every string."""
+    if not text:
+        return text
+
+    for rx, token in SCRUB_PASSES:
+        text = rx.sub(token, text)
 
     return text
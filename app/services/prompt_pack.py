@@ -0,0 +1,82 @@
+# app/services/prompt_pack.py
+import json
+import math
+
+from flask import current_app
+
+from .ai_client import model_context_length
+
+CHARS_PER_TOKEN = 3.5     # conservative for English mixed with JSON punctuation
+ANCHOR_MIN_FILL = 0.75    # a batch may end at an anchor once this full
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-leaning token estimate; no tokenizer round trip."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def context_window(model: str = None) -> int:
+    """
+    Context size (num_ctx) to request for `model`.
+
+    The model's own window as reported by Ollama, capped at
+    LLM_MAX_CONTEXT_TOKENS (the KV cache grows with num_ctx, so RAM sets
+    the real limit); LLM_CONTEXT_TOKENS when Ollama cannot be asked.
+    """
+    cfg = current_app.config
+    known = model_context_length(model)
+    if not known:
+        return cfg.get("LLM_CONTEXT_TOKENS", 4096)
+    return min(known, cfg.get("LLM_MAX_CONTEXT_TOKENS", 8192))
+
+
+def llm_options(model: str = None) -> dict:
+    """Generation options that make Ollama actually use the packed window."""
+    return {"num_ctx": context_window(model)}
+
+
+def compact_json(obj) -> str:
+    """Single-line JSON with no padding; non-ASCII kept as-is (fewer tokens than \\u escapes)."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def pack_lines(lines: list[str], fixed_tokens: int, num_ctx: int, output_tokens: int,
+               anchors: list[bool] = None) -> list[list[str]]:
+    """
+    Greedily split `lines` into as few consecutive batches as possible.
+
+    Each batch's lines fit into num_ctx minus the prompt around them
+    (`fixed_tokens`) and the room kept for the answer (`output_tokens`).
+    Order is preserved. A line too big for any batch gets one of its own
+    rather than being dropped.
+
+    With `anchors` (one flag per line, derived from something stable such
+    as the ticket number), a batch that is at least ANCHOR_MIN_FILL full
+    also ends after any anchored line. Boundaries then depend on content
+    rather than on everything before it, so a line that grows or shrinks
+    early in the list only moves batch edges until the next anchor instead
+    of shifting every later batch.
+    """
+    room = num_ctx - fixed_tokens - output_tokens
+    if room <= 0:
+        print(f"Prompt packing: template alone ({fixed_tokens} tokens) leaves no room in num_ctx={num_ctx}")
+        room = 1
+
+    batches = []
+    current = []
+    used = 0
+    for i, line in enumerate(lines):
+        cost = estimate_tokens(line) + 1   # + newline
+        if current and used + cost > room:
+            batches.append(current)
+            current, used = [], 0
+        current.append(line)
+        used += cost
+
+        if anchors is not None and anchors[i] and used >= room * ANCHOR_MIN_FILL:
+            batches.append(current)
+            current, used = [], 0
+
+    if current:
+        batches.append(current)
+    return batches
@@ -0,0 +1,143 @@
+# app/services/reclassify.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import or_, select, update
+
+from ..extensions import db
+from ..models import Ticket
+from ..signals import data_changed
+from .classifier import TAXONOMY_VERSION, classify_text, _norm
+from .topic_fallback import resolve_other_topics
+from .topic_stats import record_topic_moves
+
+RECLASSIFY_CHUNK_SIZE = 5000    # rows read per keyset page
+
+_TEXT_COLUMNS = (
+    Ticket.short_description,
+    Ticket.description,
+    Ticket.category,
+    Ticket.subcategory,
+    Ticket.assignment_group,
+    Ticket.ci,
+)
+
+
+def _classify_rows(rows):
+    """
+    Worker-process entry point.
+
+    `rows` are (id, topic, *text columns) tuples; returns (id, rule_topic,
+    text) per row, text only kept for "other" so the parent can consult
+    the LLM fallback cache.
+    """
+    out = []
+    for row in rows:
+        text = " ".join([_norm(v) for v in row[2:]])
+        topic = classify_text(text)
+        out.append((row[0], topic, text if topic == "other" else None))
+    return out
+
+
+def _split(rows, parts):
+    size = max(1, -(-len(rows) // parts))
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+
+def reclassify_tickets(workers=None, chunk_size=RECLASSIFY_CHUNK_SIZE, on_progress=None) -> dict:
+    """
+    Bring every ticket up to the current TAXONOMY_VERSION.
+
+    Streams only stale rows (older or missing taxonomy_version) in
+    keyset-paginated pages, classifies each page across a process pool
+    while the next page is being read, and writes back with set-based
+    UPDATEs: one per new topic for rows whose topic actually changes
+    (also bumping updated_at so their runbooks go stale), plus a single
+    version-only UPDATE for the rest, with topic_stats moved in the same
+    transaction. Current rows are never read or written.
+
+    Rows the rules call "other" keep any topic the LLM fallback cached for
+    their text; the model itself is not called from a bulk run.
+    """
+    workers = workers or os.cpu_count() or 2
+    stale = or_(Ticket.taxonomy_version.is_(None), Ticket.taxonomy_version != TAXONOMY_VERSION)
+    stats = {"scanned": 0, "changed": 0, "unchanged": 0}
+
+    def _read_page(after_id):
+        return db.session.execute(
+            select(Ticket.id, Ticket.topic, *_TEXT_COLUMNS)
+            .where(stale, Ticket.id > after_id)
+            .order_by(Ticket.id)
+            .limit(chunk_size)
+        ).all()
+
+    def _submit(pool, rows):
+        return [pool.submit(_classify_rows, [tuple(r) for r in part]) for part in _split(rows, workers)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = _read_page(0)
+        futures = _submit(pool, rows) if rows else []
+
+        while futures:
+            # Read the next page while the pool works on this one
+            next_rows = _read_page(rows[-1].id)
+            next_futures = _submit(pool, next_rows) if next_rows else []
+
+            results = [r for future in futures for r in future.result()]
+            others = [i for i, r in enumerate(results) if r[2] is not None]
+            if others:
+                cached = resolve_other_topics([results[i][2] for i in others], allow_llm=False)
+                for i, topic in zip(others, cached):
+                    results[i] = (results[i][0], topic, None)
+
+            old_topics = {r.id: r.topic for r in rows}
+            by_topic = {}
+            same = []
+            for ticket_id, topic, _ in results:
+                if topic == old_topics[ticket_id]:
+                    same.append(ticket_id)
+                else:
+                    by_topic.setdefault(topic, []).append(ticket_id)
+
+            moved = [i for ids in by_topic.values() for i in ids]
+            closed_at = dict(db.session.execute(
+                select(Ticket.id, Ticket.closed_at).where(Ticket.id.in_(moved))
+            ).all()) if moved else {}
+
+            now = datetime.utcnow()
+            for topic, ids in by_topic.items():
+                db.session.execute(
+                    update(Ticket)
+                    .where(Ticket.id.in_(ids))
+                    .values(topic=topic, taxonomy_version=TAXONOMY_VERSION, updated_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+            if same:
+                db.session.execute(
+                    update(Ticket)
+                    .where(Ticket.id.in_(same))
+                    .values(taxonomy_version=TAXONOMY_VERSION)
+                    .execution_options(synchronize_session=False)
+                )
+            record_topic_moves(
+                left=[(old_topics[i], closed_at[i]) for i in moved],
+                joined=[(topic, closed_at[i]) for topic, ids in by_topic.items() for i in ids],
+            )
+            db.session.commit()
+            if moved:
+                data_changed.send(
+                    current_app._get_current_object(),
+                    topics={old_topics[i] for i in moved} | set(by_topic),
+                )
+
+            stats["scanned"] += len(rows)
+            stats["changed"] += sum(len(ids) for ids in by_topic.values())
+            stats["unchanged"] += len(same)
+            if on_progress:
+                on_progress(dict(stats))
+
+            rows, futures = next_rows, next_futures
+
+    return stats
@@ -0,0 +1,71 @@
+# app/services/redaction.py
+from textwrap import shorten
+
+from .phi_scrub import SCRUBBER_VERSION, scrub_many
+
+MAX_FIELD_CHARS = 300             # truncate long descriptions for prompt
+
+# Ticket text field -> column holding its scrubbed, truncated copy
+REDACTED_COLUMNS = {
+    "short_description": "short_description_scrubbed",
+    "description": "description_scrubbed",
+}
+
+# Stored copies made under another version are recomputed on next use
+REDACTION_VERSION = f"{SCRUBBER_VERSION}-{MAX_FIELD_CHARS}"
+
+
+def redact_records(records: list[dict]) -> None:
+    """
+    Add the scrubbed copies (and REDACTION_VERSION) to ticket dicts in place.
+
+    Used by ingest for every inserted or changed row; repeated wording in a
+    chunk is only scrubbed once.
+    """
+    for field, column in REDACTED_COLUMNS.items():
+        redacted = _redact_all([rec.get(field) for rec in records])
+        for rec, value in zip(records, redacted):
+            rec[column] = value
+
+    for rec in records:
+        rec["scrub_version"] = REDACTION_VERSION
+
+
+def ensure_redacted(tickets) -> int:
+    """
+    Bring the stored copies of Ticket objects up to REDACTION_VERSION.
+
+    Only tickets stored under an older scrubber (or before redaction was
+    persisted) are touched; the caller commits. Returns how many changed.
+    """
+    stale = [t for t in tickets if t.scrub_version != REDACTION_VERSION]
+    if not stale:
+        return 0
+
+    for field, column in REDACTED_COLUMNS.items():
+        redacted = _redact_all([getattr(t, field) for t in stale])
+        for t, value in zip(stale, redacted):
+            setattr(t, column, value)
+
+    for t in stale:
+        t.scrub_version = REDACTION_VERSION
+
+    return len(stale)
+
+
+def _redact_all(texts) -> list[str]:
+    return [_shorten(s, MAX_FIELD_CHARS) for s in scrub_many([t or "" for t in texts])]
+
+
+def _shorten(text: str, width: int) -> str:
+    """
+    textwrap.shorten(text, width), without running TextWrapper on text
+    that already fits or on the part of long text it would drop anyway.
+    """
+    text = " ".join(text.split())
+    if len(text) <= width:
+        return text
+
+    # Keep whole words past the limit so the wrapper still sees the overflow
+    cut = text.find(" ", width + 1)
+    return shorten(text if cut < 0 else text[:cut], width)
@@ -0,0 +1,127 @@
+# app/services/response_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, make_response, request, session
+
+from ..signals import data_changed
+
+# In-process LRU of rendered GET responses for the read-only pages. Each
+# entry is tagged with what it shows ("dashboard", "topic:<name>",
+# "runbook:<id>"); the data_changed signal, sent by ingest, classification
+# and generation after they commit, drops the entries whose tags it
+# touches. Writers in another process (e.g. `flask import-snow`) cannot
+# signal this one, so RESPONSE_CACHE_TTL bounds how stale an entry can get.
+# Hits are revalidated by clients with ETag / Last-Modified and answered
+# with 304 when nothing changed.
+
+_entries = OrderedDict()    # key -> entry dict, least recently used first
+_lock = threading.Lock()
+_epoch = 0                  # bumped by every invalidation
+_stats = {"hits": 0, "misses": 0, "invalidated": 0}
+
+
+def cached_view(tags):
+    """
+    Cache a GET view's 200 responses. `tags(**view_kwargs)` returns the
+    tags the page depends on. Requests with pending flash messages are
+    rendered (and not stored), since the page would show them.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cfg = current_app.config
+            if (
+                request.method not in ("GET", "HEAD")
+                or not cfg.get("RESPONSE_CACHE_ENABLED", True)
+                or session.get("_flashes")
+            ):
+                return view(*args, **kwargs)
+
+            key = request.full_path
+            entry = _get(key, cfg.get("RESPONSE_CACHE_TTL", 60))
+            if entry is None:
+                epoch = _epoch
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200 or resp.is_streamed:
+                    return resp
+                entry = _put(key, resp, set(tags(**kwargs)), epoch, cfg.get("RESPONSE_CACHE_MAX_ENTRIES", 512))
+
+            resp = Response(entry["body"], mimetype=entry["mimetype"])
+            resp.set_etag(entry["etag"])
+            resp.last_modified = entry["last_modified"]
+            resp.cache_control.no_cache = True    # browsers revalidate, we answer 304
+            return resp.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def invalidate(topics=None, runbook_id=None) -> int:
+    """Drop entries showing these topics / this runbook (and the dashboard); topics=None drops everything."""
+    global _epoch
+    with _lock:
+        _epoch += 1
+        if topics is None:
+            dropped = len(_entries)
+            _entries.clear()
+        else:
+            tags = {"dashboard"} | {f"topic:{t}" for t in topics if t is not None}
+            if runbook_id is not None:
+                tags.add(f"runbook:{runbook_id}")
+            stale = [key for key, entry in _entries.items() if entry["tags"] & tags]
+            for key in stale:
+                del _entries[key]
+            dropped = len(stale)
+        _stats["invalidated"] += dropped
+    return dropped
+
+
+def stats() -> dict:
+    with _lock:
+        counters = dict(_stats, entries=len(_entries))
+    lookups = counters["hits"] + counters["misses"]
+    counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else None
+    return counters
+
+
+@data_changed.connect
+def _on_data_changed(sender, topics=None, runbook_id=None, **extra):
+    invalidate(topics=topics, runbook_id=runbook_id)
+
+
+def _get(key: str, ttl: float):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and time.time() - entry["stored"] > ttl:
+            del _entries[key]
+            entry = None
+        if entry is None:
+            _stats["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        _stats["hits"] += 1
+        return entry
+
+
+def _put(key: str, resp, tags: set, epoch: int, max_entries: int) -> dict:
+    body = resp.get_data()
+    now = time.time()
+    entry = {
+        "body": body,
+        "mimetype": resp.mimetype,
+        "etag": hashlib.sha1(body).hexdigest(),
+        "last_modified": int(now),
+        "tags": tags,
+        "stored": now,
+    }
+    with _lock:
+        # Data changed while we rendered: serve this copy but don't keep it
+        if epoch == _epoch:
+            _entries[key] = entry
+            _entries.move_to_end(key)
+            while len(_entries) > max_entries:
+                _entries.popitem(last=False)
+    return entry
@@ -1,23 +1,36 @@
 # app/services/runbook_gen.py
+import hashlib
 import json
-from textwrap import shorten
+import zlib
+from datetime import datetime
 
+from flask import current_app
 from jinja2 import Template
+from sqlalchemy.orm import defer
 
 from .ai_client import call_llm
 from .phi_scrub import scrub_text
-from .classifier import classify_ticket
+from .classifier import TAXONOMY_VERSION, classify_many, _ticket_text
+from .dedup import DEDUP_JACCARD, SHINGLE_WORDS, collapse_briefs
+from .llm_executor import map_llm
+from .prompt_pack import compact_json, estimate_tokens, llm_options, pack_lines
+from .redaction import REDACTION_VERSION, ensure_redacted
+from .topic_fallback import resolve_other_topics
+from .topic_stats import record_runbook, record_topic_moves
 
 from ..extensions import db
-from ..models import Ticket, Runbook
+from ..models import BatchSummary, Ticket, Runbook
+from ..signals import data_changed
 
 # -------------------------------------------------------------------
 # Config for summarisation / batching
 # -------------------------------------------------------------------
 
-MAX_TICKETS_FOR_SUMMARY = 400     # cap tickets per topic used for summary
-SUMMARY_BATCH_SIZE = 80           # tickets per LLM batch (5 batches max)
-MAX_FIELD_CHARS = 300             # truncate long descriptions for prompt
+SUMMARY_OUTPUT_TOKENS = 600       # room kept for each batch summary (~300 words)
+SUMMARY_FANIN = 6                 # summaries merged per reduce call
+CHECKPOINT_LOOKUP_CHUNK = 500     # fingerprints per IN (...) lookup
+BATCH_ANCHOR_EVERY = 8            # ~1 in N tickets may end a batch (stable boundaries)
+PLAN_VERSION = 2                  # bump when ticket briefs, dedup or batch packing change
 
 
 ENV_CONTEXT = """
@@ -46,60 +59,67 @@ def assign_topics_to_tickets(tickets):
     """
     Assign taxonomy-based topics to a list of Ticket objects.
 
-    Uses hybrid classifier (heuristics + LLM fallback) from services.classifier.
+    Uses hybrid classifier (heuristics + LLM fallback) from services.classifier:
+    whatever the rules leave as "other" goes through the batched, cached
+    LLM fallback in services.topic_fallback.
     """
-    for t in tickets:
-        t.topic = classify_ticket(t)
+    topics = classify_many(tickets)
 
+    others = [i for i, topic in enumerate(topics) if topic == "other"]
+    if others:
+        fallback = resolve_other_topics([_ticket_text(tickets[i]) for i in others])
+        for i, topic in zip(others, fallback):
+            topics[i] = topic
+
+    left = [(t.topic, t.closed_at) for t, topic in zip(tickets, topics) if t.topic != topic]
+    joined = [(topic, t.closed_at) for t, topic in zip(tickets, topics) if t.topic != topic]
+
+    for t, topic in zip(tickets, topics):
+        t.topic = topic
+        t.taxonomy_version = TAXONOMY_VERSION
+
+    record_topic_moves(left=left, joined=joined)
     db.session.commit()
 
+    topics = {topic for topic, _ in left + joined}
+    if topics:
+        data_changed.send(current_app._get_current_object(), topics=topics)
+
 
 # -------------------------------------------------------------------
 # Ticket summarisation helpers
 # -------------------------------------------------------------------
 
 def _ticket_brief(t: Ticket) -> dict:
-    """Minimal, scrubbed view of a ticket for prompts."""
-    return {
+    """
+    Minimal, scrubbed view of a ticket for prompts.
+
+    Reads the redacted copies stored at ingest; call ensure_redacted()
+    on the tickets first so copies from an older scrubber are refreshed.
+    Empty fields are left out; they only cost tokens.
+    """
+    brief = {
         "number": t.number or "",
-        "short_description": shorten(scrub_text(t.short_description or ""), MAX_FIELD_CHARS),
-        "description": shorten(scrub_text(t.description or ""), MAX_FIELD_CHARS),
+        "short_description": t.short_description_scrubbed or "",
+        "description": t.description_scrubbed or "",
         "category": (t.category or "").lower(),
         "subcategory": (t.subcategory or "").lower(),
         "assignment_group": (t.assignment_group or "").lower(),
         "ci": (t.ci or "").lower(),
     }
+    return {k: v for k, v in brief.items() if v}
 
 
-def summarize_tickets_for_topic(topic: str, tickets: list[Ticket]) -> str:
-    """
-    Summarise a large set of tickets into a compact description of patterns.
-
-    Strategy:
-    - Take up to MAX_TICKETS_FOR_SUMMARY most recent tickets.
-    - Chunk into SUMMARY_BATCH_SIZE.
-    - For each chunk, get a short pattern summary from the LLM.
-    - Merge chunk summaries with a final LLM call.
-    """
-    if not tickets:
-        return f"No historical tickets exist for topic '{topic}'."
-
-    # Use the most recent tickets; they best represent current environment
-    sample = tickets[-MAX_TICKETS_FOR_SUMMARY:]
-
-    batch_summaries: list[str] = []
-
-    for i in range(0, len(sample), SUMMARY_BATCH_SIZE):
-        batch = sample[i : i + SUMMARY_BATCH_SIZE]
-        brief_batch = [_ticket_brief(t) for t in batch]
-
-        prompt = f"""
+def _batch_prompt(topic: str, ticket_lines: list[str]) -> str:
+    return f"""
 {ENV_CONTEXT}
 
 You are analysing incident tickets for topic: '{topic}'.
 
-Here is a JSON array of example tickets (fields are already scrubbed of PHI):
-{json.dumps(brief_batch, indent=2)}
+Here are example tickets, one JSON object per line (fields are already scrubbed of PHI).
+A "count" field means that many near-identical tickets were merged into that line;
+weigh patterns by it:
+{chr(10).join(ticket_lines)}
 
 From ONLY these tickets, produce a short analysis of patterns.
 
@@ -115,14 +135,10 @@ REQUIREMENTS:
 
 Keep it under ~300 words.
 """
-        raw = call_llm(prompt)
-        batch_summaries.append(scrub_text(raw).strip())
 
-    if len(batch_summaries) == 1:
-        return batch_summaries[0]
 
-    # Merge multiple batch summaries
-    merge_prompt = f"""
+def _merge_prompt(topic: str, batch_summaries: list[str]) -> str:
+    return f"""
 {ENV_CONTEXT}
 
 You are consolidating multiple partial analyses for topic '{topic}'.
@@ -130,7 +146,7 @@ You are consolidating multiple partial analyses for topic '{topic}'.
 Here are several short summaries, each describing patterns in a subset of tickets:
 
 --------
-{chr(10*2).join(batch_summaries)}
+{(chr(10) * 2).join(batch_summaries)}
 --------
 
 TASK:
@@ -140,36 +156,244 @@ TASK:
 
 Return plain text, no JSON.
 """
-    merged = call_llm(merge_prompt)
-    return scrub_text(merged).strip()
 
 
-# -------------------------------------------------------------------
-# Runbook generation
-# -------------------------------------------------------------------
-
-def generate_runbook_for_topic(topic: str) -> Runbook:
+def _input_fingerprint(topic: str, options: dict) -> str:
     """
-    Create/update the runbook for a given topic.
+    Fingerprint of everything the model would be shown for `topic`, taken
+    from ticket ids and change markers instead of their text.
 
-    Pipeline:
-    1. Load tickets for that topic.
-    2. Summarise patterns across tickets (summarize_tickets_for_topic).
-    3. Ask LLM to turn that summary into a structured JSON runbook.
-    4. Render JSON into markdown and persist to DB.
+    Briefs, batches and prompts are all derived from the tickets' ingested
+    content (content_hash / updated_at) under the current redaction rules,
+    plus the model, options, templates and planning settings, so equal
+    fingerprints mean equal prompts without loading or redacting a ticket.
     """
-    tickets = (
-        Ticket.query
+    rows = (
+        db.session.query(Ticket.id, Ticket.content_hash, Ticket.updated_at)
         .filter_by(topic=topic)
-        .order_by(Ticket.opened_at)
-        .all()
+        .order_by(Ticket.opened_at, Ticket.id)
+    )
+    return _fingerprint(
+        current_app.config.get("LOCAL_LLM_MODEL"),
+        compact_json(options),
+        _batch_prompt(topic, []),
+        _merge_prompt(topic, []),
+        _runbook_prompt(topic, ""),
+        PLAN_VERSION, REDACTION_VERSION, SUMMARY_FANIN, SUMMARY_OUTPUT_TOKENS,
+        BATCH_ANCHOR_EVERY, DEDUP_JACCARD, SHINGLE_WORDS,
+        *[f"{i}:{h or ''}:{u.isoformat() if u else ''}" for i, h, u in rows],
     )
 
-    # Step 1: summarise ticket history
-    summary_text = summarize_tickets_for_topic(topic, tickets)
 
-    # Step 2: build runbook via JSON-only LLM call
-    runbook_prompt = f"""
+def _plan_batches(topic: str, tickets: list[Ticket], options: dict) -> list[dict]:
+    """
+    Split a topic's whole history into fingerprinted summary batches.
+
+    Near-identical tickets are first collapsed into one representative
+    with a "count" (services.dedup), so the model sees each distinct
+    problem once, weighted by how often it occurs. The history is packed
+    oldest first with content-anchored boundaries, so batch edges stay put
+    as tickets arrive and counts change: new tickets only change the
+    batches they land in. Each batch's fingerprint covers the model, its
+    options, the prompt template and the exact lines (ids, redacted
+    content and counts).
+    """
+    # Only tickets scrubbed under older rules (or never) are scrubbed here
+    if ensure_redacted(tickets):
+        db.session.commit()
+
+    reps = collapse_briefs([_ticket_brief(t) for t in tickets])
+    lines = [compact_json(brief) for _, brief in reps]
+    anchors = [
+        zlib.crc32((tickets[i].number or "").encode("utf-8")) % BATCH_ANCHOR_EVERY == 0
+        for i, _ in reps
+    ]
+    packed = pack_lines(
+        lines,
+        fixed_tokens=estimate_tokens(_batch_prompt(topic, [])),
+        num_ctx=options["num_ctx"],
+        output_tokens=SUMMARY_OUTPUT_TOKENS,
+        anchors=anchors,
+    )
+    print(f"Runbook '{topic}': {len(tickets)} tickets collapsed to {len(reps)} distinct, "
+          f"{len(packed)} batches")
+
+    template = _fingerprint(
+        current_app.config.get("LOCAL_LLM_MODEL"), compact_json(options), _batch_prompt(topic, [])
+    )
+
+    batches = []
+    start = 0
+    for batch_lines in packed:
+        batch_reps = reps[start : start + len(batch_lines)]
+        start += len(batch_lines)
+        ids = [str(tickets[i].id) for i, _ in batch_reps]
+        batches.append({
+            "fingerprint": _fingerprint(template, ",".join(ids), *batch_lines),
+            "lines": batch_lines,
+            "ticket_count": sum(brief.get("count", 1) for _, brief in batch_reps),
+        })
+    return batches
+
+
+def _summarize_batches(topic: str, batches: list[dict], options: dict, cancel=None, on_event=None):
+    """
+    Tree-reduce the batches to one summary.
+
+    Level 0 summarises each batch; every further level merges consecutive
+    groups of SUMMARY_FANIN summaries from the level below, until one is
+    left. Merge depth is log_FANIN(batches), so a topic's full history is
+    covered at any size. Every node is checkpointed in batch_summaries
+    under a fingerprint of its inputs, and groups are fixed from the oldest
+    batch, so an incremental run re-does one node per level (plus the new
+    batches) and an interrupted run resumes where it stopped.
+
+    Returns (summary_text, complete, fingerprints of every tree node);
+    `complete` is False when any model call failed, in which case nothing
+    built on the failure is persisted. `on_event` receives progress per
+    level (see generate_runbook_for_topic).
+    """
+    if not batches:
+        return f"No historical tickets exist for topic '{topic}'.", True, set()
+
+    merge_template = _fingerprint(
+        current_app.config.get("LOCAL_LLM_MODEL"), compact_json(options), _merge_prompt(topic, [])
+    )
+
+    nodes = [
+        dict(batch, prompt=lambda batch=batch: _batch_prompt(topic, batch["lines"]), ok=True)
+        for batch in batches
+    ]
+    level = 0
+    complete = True
+    used = set()
+
+    while True:
+        complete &= _run_level(topic, level, nodes, options, cancel, on_event)
+        used.update(n["fingerprint"] for n in nodes)
+        if len(nodes) == 1:
+            return nodes[0]["summary"], complete, used
+
+        parents = []
+        for i in range(0, len(nodes), SUMMARY_FANIN):
+            group = nodes[i : i + SUMMARY_FANIN]
+            if len(group) == 1:
+                # Nothing to merge: carry the node up unchanged
+                parents.append(group[0])
+                continue
+
+            texts = [n["summary"] for n in group]
+            parents.append({
+                "fingerprint": _fingerprint(merge_template, *[n["fingerprint"] for n in group]),
+                "prompt": lambda texts=texts: _merge_prompt(topic, texts),
+                "ticket_count": sum(n["ticket_count"] for n in group),
+                "ok": all(n["ok"] for n in group),
+            })
+
+        nodes = parents
+        level += 1
+
+
+def _run_level(topic: str, level: int, nodes: list[dict], options: dict, cancel=None, on_event=None) -> bool:
+    """
+    Fill node["summary"] for one tree level: stored checkpoints first, the
+    rest in parallel through map_llm. Returns False if any call failed.
+    """
+    todo = [n for n in nodes if "summary" not in n]
+
+    stored = {}
+    fingerprints = [n["fingerprint"] for n in todo]
+    for i in range(0, len(fingerprints), CHECKPOINT_LOOKUP_CHUNK):
+        stored.update(
+            db.session.query(BatchSummary.fingerprint, BatchSummary.summary)
+            .filter(BatchSummary.fingerprint.in_(fingerprints[i : i + CHECKPOINT_LOOKUP_CHUNK]))
+            .all()
+        )
+
+    missing = []
+    skipped = 0
+    for node in todo:
+        if node["fingerprint"] in stored:
+            node["summary"] = stored[node["fingerprint"]]
+        elif node["ok"]:
+            missing.append(node)
+        else:
+            # Inputs include a failed summary: don't spend a call on it
+            node["summary"] = "UNKNOWN"
+            skipped += 1
+
+    print(f"Runbook '{topic}' level {level}: {len(nodes)} nodes, "
+          f"{len(todo) - len(missing) - skipped} from checkpoints, {len(missing)} to the model, "
+          f"{skipped} skipped after failures")
+
+    progress = None
+    if on_event is not None:
+        stage = "summarising" if level == 0 else "merging"
+        ready = len(nodes) - len(missing)
+        on_event({"stage": stage, "level": level, "done": ready, "total": len(nodes)})
+        progress = lambda finished, _: on_event(
+            {"stage": stage, "level": level, "done": ready + finished, "total": len(nodes)}
+        )
+
+    # Nodes of one level are independent: run them concurrently, in order
+    answers = map_llm([node["prompt"]() for node in missing], cancel=cancel, on_done=progress, options=options)
+
+    for node, raw in zip(missing, answers):
+        if raw == "UNKNOWN":
+            node["summary"] = raw
+            node["ok"] = False
+            continue
+
+        node["summary"] = scrub_text(raw).strip()
+        db.session.add(BatchSummary(
+            topic=topic,
+            level=level,
+            fingerprint=node["fingerprint"],
+            summary=node["summary"],
+            ticket_count=node["ticket_count"],
+        ))
+    db.session.commit()
+
+    return all(n["ok"] for n in nodes)
+
+
+def summarize_tickets_for_topic(topic: str, tickets: list[Ticket], cancel=None) -> str:
+    """
+    Summarise a large set of tickets into a compact description of patterns.
+
+    Strategy:
+    - Pack the topic's whole history (compact JSON briefs, one per line)
+      into as few batches as the model's context window allows, keeping
+      SUMMARY_OUTPUT_TOKENS free for each answer.
+    - Summarise every batch, then merge summaries SUMMARY_FANIN at a time,
+      level by level, until one summary is left. Each level runs
+      concurrently (LLM_CONCURRENCY) and every node is checkpointed, so
+      unchanged parts of the tree are never sent to the model again.
+
+    `cancel` (a threading.Event) abandons outstanding LLM calls.
+    """
+    if not tickets:
+        return f"No historical tickets exist for topic '{topic}'."
+
+    options = llm_options()
+    summary, _, _ = _summarize_batches(topic, _plan_batches(topic, tickets, options), options, cancel)
+    return summary
+
+
+def _fingerprint(*parts) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x1e")
+    return h.hexdigest()
+
+
+# -------------------------------------------------------------------
+# Runbook generation
+# -------------------------------------------------------------------
+
+def _runbook_prompt(topic: str, summary_text: str) -> str:
+    return f"""
 {ENV_CONTEXT}
 
 You are an experienced Tier 2 / Tier 3 engineer writing a practical runbook.
@@ -217,10 +441,88 @@ Example of the expected SHAPE (not the content):
 Now generate the JSON for topic "{topic}" based on the ticket summary above.
 """
 
-    raw = call_llm(runbook_prompt)
+
+def generate_runbook_for_topic(topic: str, cancel=None, on_event=None) -> tuple[Runbook, bool]:
+    """
+    Create/update the runbook for a given topic.
+
+    Pipeline:
+    1. If the runbook was built from exactly these inputs, stop: no LLM call.
+    2. Load tickets for that topic and plan fingerprinted summary batches.
+    3. Tree-reduce the whole history to one summary, reusing checkpoints.
+    4. Ask LLM to turn that summary into a structured JSON runbook.
+    5. Render JSON into markdown and persist to DB (JSON in json_blob).
+
+    `on_event(dict)`, if given, is called as the pipeline advances, with
+    "stage" one of: unchanged, planned, summarising / merging (with
+    level, done, total), writing, token (with the runbook text as it
+    streams from the model), rendering. If `cancel` (a threading.Event) is
+    set mid-run, checkpoints already made are kept but the runbook itself
+    is left untouched.
+
+    Returns (runbook, complete): the runbook as it now stands (the existing
+    one, or None, when cancelled) and whether every model call succeeded,
+    so callers can report a run that only kept or marked the old runbook.
+
+    last_updated is when the inputs were read, so tickets changed while
+    the run was in flight still count as newer than the runbook.
+    """
+    # Step 1: fingerprint the inputs from ticket ids and change markers;
+    # if the runbook was built from exactly these, stop before loading text
+    inputs_read_at = datetime.utcnow()
+    options = llm_options()
+    input_fingerprint = _input_fingerprint(topic, options)
+
+    emit = on_event or (lambda event: None)
+
+    rb = Runbook.query.filter_by(topic=topic).first()
+    if rb and rb.input_fingerprint == input_fingerprint:
+        print(f"Runbook '{topic}': inputs unchanged, LLM skipped")
+        emit({"stage": "unchanged"})
+        rb.last_updated = inputs_read_at
+        record_runbook(rb)
+        db.session.commit()
+        data_changed.send(current_app._get_current_object(), topics=[topic], runbook_id=rb.id)
+        return rb, True
+
+    # Step 2: load the tickets and plan fingerprinted summary batches
+    tickets = (
+        Ticket.query
+        .options(defer(Ticket.work_notes), defer(Ticket.resolution_notes))   # never prompted
+        .filter_by(topic=topic)
+        .order_by(Ticket.opened_at, Ticket.id)
+        .all()
+    )
+    batches = _plan_batches(topic, tickets, options)
+    emit({"stage": "planned", "tickets": len(tickets), "batches": len(batches)})
+
+    # Step 3: summarise ticket history
+    summary_text, complete, used = _summarize_batches(topic, batches, options, cancel, on_event)
+
+    if cancel is not None and cancel.is_set():
+        print(f"Runbook '{topic}': cancelled, runbook left as it was")
+        db.session.rollback()
+        return rb, False
+
+    # Step 4: build runbook via JSON-only LLM call, streamed to on_event
+    emit({"stage": "writing"})
+    raw = call_llm(
+        _runbook_prompt(topic, summary_text),
+        options=options,
+        cancel=cancel,
+        on_token=lambda text: emit({"stage": "token", "text": text}),
+    )
     print("RAW LLM OUTPUT (runbook_gen):", raw)
+    complete = complete and raw != "UNKNOWN"
+
+    if cancel is not None and cancel.is_set():
+        print(f"Runbook '{topic}': cancelled, runbook left as it was")
+        db.session.rollback()
+        return rb, False
 
-    # Step 3: JSON parsing with defensive fallback
+    emit({"stage": "rendering"})
+
+    # JSON parsing with defensive fallback
     data = _safe_parse_runbook_json(raw, topic)
 
     # Normalise missing keys
@@ -264,18 +566,50 @@ _(No references recorded yet.)_
         refs=refs,
     )
 
-    # Step 4: upsert Runbook row
-    rb = Runbook.query.filter_by(topic=topic).first()
+    # Step 5: upsert Runbook row. After a failed model call the content is
+    # fallback text: an existing runbook keeps its content and date, and is
+    # only marked for retry (a NULL fingerprint is always stale)
+    if rb and not complete:
+        print(f"Runbook '{topic}': incomplete run, previous runbook kept")
+        rb.input_fingerprint = None
+        record_runbook(rb, pending=len(tickets))
+        db.session.commit()
+        data_changed.send(current_app._get_current_object(), topics=[topic], runbook_id=rb.id)
+        return rb, False
+
     if not rb:
         rb = Runbook(topic=topic, title=title)
         db.session.add(rb)
 
     rb.title = title
     rb.markdown = markdown
+    rb.json_blob = json.dumps(
+        {"title": title, "summary": summary, "steps": steps, "references": refs},
+        ensure_ascii=False,
+    )
     rb.tickets_used = len(tickets)
-
+    rb.last_updated = inputs_read_at
+    # A run with a failed model call must not be mistaken for a finished one
+    rb.input_fingerprint = input_fingerprint if complete else None
+
+    # Checkpoints no longer part of the tree can never be reused
+    if complete:
+        stale_ids = [
+            row.id
+            for row in db.session.query(BatchSummary.id, BatchSummary.fingerprint).filter_by(topic=topic)
+            if row.fingerprint not in used
+        ]
+        for i in range(0, len(stale_ids), CHECKPOINT_LOOKUP_CHUNK):
+            BatchSummary.query.filter(
+                BatchSummary.id.in_(stale_ids[i : i + CHECKPOINT_LOOKUP_CHUNK])
+            ).delete(synchronize_session=False)
+
+    db.session.flush()   # rb.id for a new runbook
+    # A first runbook from an incomplete run is shown, but as still pending
+    record_runbook(rb, pending=0 if complete else len(tickets))
     db.session.commit()
-    return rb
+    data_changed.send(current_app._get_current_object(), topics=[topic], runbook_id=rb.id)
+    return rb, complete
 
 
 def _safe_parse_runbook_json(raw: str, topic: str) -> dict:
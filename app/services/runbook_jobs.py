@@ -0,0 +1,388 @@
+# app/services/runbook_jobs.py
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import case, func, or_
+
+from ..extensions import db
+from ..models import Runbook, RunbookJob, Ticket
+from ..signals import data_changed
+from .job_leases import abandoned_jobs, claim_values, job_lease
+from .runbook_gen import generate_runbook_for_topic
+
+# Runbook regeneration as persisted jobs. Jobs are rows in runbook_jobs;
+# a small pool of drainer threads repeatedly claims the most urgent queued
+# job (user requests first, then most new/changed tickets, then oldest)
+# and runs the normal generation pipeline for it. The rows are the queue,
+# so a job queued by one process can be picked up by another, and nothing
+# is lost if no worker is running when it is enqueued.
+
+ETA_SAMPLE_JOBS = 20    # recent finished jobs averaged for the ETA
+
+_executor = None
+_drainers = 0
+_drainer_futures = []
+_drainers_lock = threading.Lock()   # guards _drainers and serialises claims
+
+
+def runbook_workers(app) -> int:
+    return max(1, app.config.get("RUNBOOK_WORKERS", 1))
+
+
+def _get_executor(app):
+    """One process-wide pool; RUNBOOK_WORKERS bounds concurrent generations."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=runbook_workers(app),
+            thread_name_prefix="runbook-gen",
+        )
+    return _executor
+
+
+# -------------------------------------------------------------------
+# Staleness / enqueue
+# -------------------------------------------------------------------
+
+def stale_topics(topic: str = None) -> dict[str, int]:
+    """
+    Topics whose ticket set changed since their runbook was built, mapped
+    to how many tickets are new or changed (their priority).
+
+    A ticket counts when its updated_at is newer than Runbook.last_updated
+    (ingest and reclassification both bump it), or when the topic has no
+    runbook yet or only one from an incomplete run (NULL
+    input_fingerprint), so the scheduler retries it. Topics that only lost
+    tickets are caught by comparing the current count with
+    Runbook.tickets_used. One grouped query.
+    """
+    changed = func.sum(case(
+        (or_(
+            Runbook.id.is_(None),
+            Runbook.input_fingerprint.is_(None),
+            Ticket.updated_at > Runbook.last_updated,
+        ), 1),
+        else_=0,
+    ))
+    query = (
+        db.session.query(Ticket.topic, changed, func.count(Ticket.id), func.max(Runbook.tickets_used))
+        .outerjoin(Runbook, Runbook.topic == Ticket.topic)
+        .filter(Ticket.topic.isnot(None))
+        .group_by(Ticket.topic)
+    )
+    if topic is not None:
+        query = query.filter(Ticket.topic == topic)
+
+    stale = {}
+    for name, n_changed, total, used in query.all():
+        removed = abs(total - used) if used is not None else 0
+        if n_changed or removed:
+            stale[name] = max(n_changed or 0, removed)
+    return stale
+
+
+def enqueue_runbook(app, topic: str, priority: int = 0, requested_by: str = "user") -> RunbookJob:
+    """
+    Queue regeneration of one topic and make sure workers are running.
+
+    A topic has at most one queued job: enqueueing it again raises that
+    job's priority (and promotes it to a user request) instead of adding a
+    second one. Returns the persisted job.
+    """
+    job = RunbookJob.query.filter_by(topic=topic, status="queued").first()
+    if job is None:
+        job = RunbookJob(topic=topic, status="queued", priority=priority, requested_by=requested_by)
+        db.session.add(job)
+    else:
+        job.priority = max(job.priority or 0, priority)
+        if requested_by == "user":
+            job.requested_by = "user"
+    db.session.commit()
+    data_changed.send(app, topics=[topic])
+
+    start_runbook_workers(app)
+    return job
+
+
+def enqueue_stale_runbooks(app) -> list[RunbookJob]:
+    """Queue every stale topic (see stale_topics) as a scheduler job."""
+    return [
+        enqueue_runbook(app, topic, priority=count, requested_by="scheduler")
+        for topic, count in stale_topics().items()
+    ]
+
+
+# -------------------------------------------------------------------
+# Workers
+# -------------------------------------------------------------------
+
+def start_runbook_workers(app):
+    """Top the pool up to RUNBOOK_WORKERS drainers."""
+    global _drainers
+    with _drainers_lock:
+        while _drainers < runbook_workers(app):
+            _drainers += 1
+            _drainer_futures.append(_get_executor(app).submit(_drain_queue, app))
+
+
+def wait_for_runbook_workers():
+    """Block until every drainer in this process has run out of jobs."""
+    while True:
+        with _drainers_lock:
+            _drainer_futures[:] = [f for f in _drainer_futures if not f.done()]
+            pending = list(_drainer_futures)
+        if not pending:
+            return
+        wait(pending)
+
+
+def _drain_queue(app):
+    """Claim and run queued jobs until none are left, then retire."""
+    global _drainers
+    retired = False
+    with app.app_context():
+        try:
+            while True:
+                # Claiming under the lock means an enqueue either sees this
+                # drainer still counted or the drainer sees its job
+                with _drainers_lock:
+                    try:
+                        job_id = _claim_next_job()
+                    except Exception as e:
+                        print("Runbook queue claim failed:", e)
+                        job_id = None
+                    if job_id is None:
+                        _drainers -= 1
+                        retired = True
+                        return
+
+                try:
+                    run_runbook_job(job_id)
+                except Exception as e:
+                    # The job stays "running" until its lease runs out
+                    print(f"Runbook job {job_id} could not be recorded:", e)
+                    db.session.rollback()
+        finally:
+            if not retired:
+                with _drainers_lock:
+                    _drainers -= 1
+            db.session.remove()
+
+
+def _claim_next_job():
+    """
+    Atomically move the most urgent queued job to running; None if nothing
+    is claimable. Topics already being generated (by any process) wait, so
+    one topic's checkpoints are never written by two jobs at once.
+    """
+    reap_runbook_jobs(current_app._get_current_object())
+
+    running_topics = db.session.query(RunbookJob.topic).filter(RunbookJob.status == "running")
+    while True:
+        candidate = (
+            db.session.query(RunbookJob.id, RunbookJob.topic)
+            .filter(RunbookJob.status == "queued", RunbookJob.topic.notin_(running_topics))
+            .order_by(
+                case((RunbookJob.requested_by == "user", 0), else_=1),
+                RunbookJob.priority.desc(),
+                RunbookJob.id,
+            )
+            .first()
+        )
+        if candidate is None:
+            db.session.rollback()
+            return None
+
+        claimed = (
+            RunbookJob.query
+            .filter_by(id=candidate.id, status="queued")
+            .update({"status": "running", "started_at": datetime.utcnow(), **claim_values()})
+        )
+        db.session.commit()
+        if claimed:
+            data_changed.send(current_app._get_current_object(), topics=[candidate.topic])
+            return candidate.id
+
+
+def claim_topic(topic: str):
+    """
+    Take a topic for generation outside the pool (the live stream view):
+    its queued job, if any, becomes running, otherwise a running job is
+    recorded. Returns the job, or None if the topic is already running.
+    """
+    with _drainers_lock:
+        reap_runbook_jobs(current_app._get_current_object())
+        if RunbookJob.query.filter_by(topic=topic, status="running").first() is not None:
+            db.session.rollback()
+            return None
+
+        job = RunbookJob.query.filter_by(topic=topic, status="queued").first()
+        if job is None:
+            job = RunbookJob(topic=topic, priority=stale_topics(topic).get(topic, 0), requested_by="user")
+            db.session.add(job)
+        job.status = "running"
+        job.started_at = datetime.utcnow()
+        for column, value in claim_values().items():
+            setattr(job, column, value)
+        db.session.commit()
+
+    data_changed.send(current_app._get_current_object(), topics=[topic])
+    return job
+
+
+def run_runbook_job(job_id: int, cancel=None, on_event=None):
+    """Generate a claimed job's runbook and record how it ended."""
+    app = current_app._get_current_object()
+    job = db.session.get(RunbookJob, job_id)
+    try:
+        with job_lease(app, RunbookJob, job_id):
+            rb, complete = generate_runbook_for_topic(job.topic, cancel=cancel, on_event=on_event)
+        if cancel is not None and cancel.is_set():
+            job.status = "cancelled"
+        elif not complete:
+            # Not "done": it would count towards the ETA average and hide
+            # that the runbook is still pending a retry
+            job.status = "failed"
+            job.error = "A model call failed; the topic stays stale and will be retried"
+        else:
+            job.status = "done"
+        job.runbook_id = rb.id if rb else None
+
+    except Exception as e:
+        print(f"Runbook job {job_id} ({job.topic}) failed:", e)
+        db.session.rollback()
+        job.status = "failed"
+        job.error = str(e)
+
+    job.finished_at = datetime.utcnow()
+    try:
+        db.session.commit()
+    except Exception as e:
+        # Record at least that it ended, without the state that failed
+        print(f"Runbook job {job_id} ({job.topic}) result not saved:", e)
+        db.session.rollback()
+        RunbookJob.query.filter_by(id=job_id).update({
+            "status": "failed",
+            "error": f"Result not saved: {e}",
+            "finished_at": datetime.utcnow(),
+        })
+        db.session.commit()
+    data_changed.send(app, topics=[job.topic])
+    return job
+
+
+def reap_runbook_jobs(app) -> int:
+    """
+    Release jobs left "running" by a worker that is gone (a crash or a
+    restart), so their topics can be claimed again: those whose lease has
+    expired or whose owner process has exited (see job_leases). Each goes
+    back to the queue, or is marked failed if its topic already has a
+    queued job. Returns how many were released.
+    """
+    stuck = abandoned_jobs(app, RunbookJob)
+    if not stuck:
+        return 0
+
+    for job in stuck:
+        if RunbookJob.query.filter_by(topic=job.topic, status="queued").first() is None:
+            job.status = "queued"
+            job.started_at = None
+            job.owner = None
+            job.heartbeat_at = None
+        else:
+            job.status = "failed"
+            job.error = "Interrupted; the topic was queued again"
+            job.finished_at = datetime.utcnow()
+    db.session.commit()
+    print(f"Released {len(stuck)} interrupted runbook job(s)")
+    data_changed.send(app, topics={job.topic for job in stuck})
+    return len(stuck)
+
+
+def resume_runbook_jobs(app) -> int:
+    """
+    At startup: release abandoned jobs, then work off the queue. Jobs other
+    live processes are running keep their lease and are left alone.
+    """
+    reap_runbook_jobs(app)
+    queued = RunbookJob.query.filter_by(status="queued").count()
+    if queued:
+        start_runbook_workers(app)
+    return queued
+
+
+# -------------------------------------------------------------------
+# Status
+# -------------------------------------------------------------------
+
+def average_job_seconds():
+    """Mean duration of the last ETA_SAMPLE_JOBS finished jobs, or None."""
+    recent = (
+        db.session.query(RunbookJob.started_at, RunbookJob.finished_at)
+        .filter(RunbookJob.status == "done", RunbookJob.started_at.isnot(None))
+        .order_by(RunbookJob.finished_at.desc())
+        .limit(ETA_SAMPLE_JOBS)
+        .all()
+    )
+    if not recent:
+        return None
+    return sum((f - s).total_seconds() for s, f in recent) / len(recent)
+
+
+def queue_status(app) -> dict:
+    """
+    Queue depth plus an ETA for draining it: running jobs are assumed to
+    need the rest of an average job, queued ones a whole one, shared across
+    RUNBOOK_WORKERS.
+    """
+    now = datetime.utcnow()
+    workers = runbook_workers(app)
+    avg = average_job_seconds()
+
+    queued = RunbookJob.query.filter_by(status="queued").count()
+    running = RunbookJob.query.filter_by(status="running").all()
+
+    eta = None
+    if avg is not None:
+        remaining = sum(max(avg - (now - j.started_at).total_seconds(), 0) for j in running)
+        eta = round((remaining + queued * avg) / workers, 1)
+
+    return {
+        "queued": queued,
+        "running": len(running),
+        "running_topics": [j.topic for j in running],
+        "workers": workers,
+        "avg_job_seconds": round(avg, 1) if avg is not None else None,
+        "eta_seconds": eta,
+    }
+
+
+def job_position(job: RunbookJob) -> int:
+    """Queued jobs that will be claimed before `job` (0 = next)."""
+    user_first = case((RunbookJob.requested_by == "user", 0), else_=1)
+    mine = 0 if job.requested_by == "user" else 1
+    return (
+        RunbookJob.query
+        .filter(RunbookJob.status == "queued", RunbookJob.id != job.id)
+        .filter(or_(
+            user_first < mine,
+            (user_first == mine) & (RunbookJob.priority > (job.priority or 0)),
+            (user_first == mine) & (RunbookJob.priority == (job.priority or 0)) & (RunbookJob.id < job.id),
+        ))
+        .count()
+    )
+
+
+def job_status(app, job: RunbookJob) -> dict:
+    """job.to_dict() plus, while queued, its place in line and an ETA."""
+    payload = job.to_dict()
+    if job.status == "queued":
+        avg = average_job_seconds()
+        position = job_position(job)
+        payload["position"] = position
+        payload["eta_seconds"] = (
+            round((position // runbook_workers(app) + 1) * avg, 1) if avg is not None else None
+        )
+    return payload
@@ -0,0 +1,104 @@
+# app/services/search.py
+import re
+
+from markupsafe import Markup, escape
+
+from ..extensions import db
+
+# Ranked full-text search over the FTS5 indexes declared in models.py.
+# Ticket hits only ever come from the scrubbed columns, so snippets are
+# safe to show. Results are ordered by bm25 (title / short description
+# weighted above body text) and paged with LIMIT/OFFSET; one extra row is
+# fetched to know whether a next page exists instead of counting matches.
+#
+# bm25 costs a few microseconds per matching row, so a term found in a
+# third of a million tickets takes seconds to rank in full. Only the
+# newest RANK_WINDOW matches are ranked: a cheap rowid-ordered pass finds
+# the window's lower bound, which FTS5 applies as a rowid range.
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE = 50          # pages beyond the rank window would be empty anyway
+MAX_QUERY_TERMS = 12
+RANK_WINDOW = 1000            # >= SEARCH_PAGE_SIZE * MAX_SEARCH_PAGE
+
+_TERM_RE = re.compile(r"(\w+)(\*?)", re.UNICODE)
+_HL_OPEN, _HL_CLOSE = "\x02", "\x03"
+
+# Dates are typed so rows carry datetimes, not SQLite's stored strings
+_TICKETS_SQL = db.text(f"""
+    SELECT t.id, t.number, t.topic, t.opened_at,
+           snippet(tickets_fts, -1, '{_HL_OPEN}', '{_HL_CLOSE}', '…', 16) AS snippet
+    FROM tickets_fts
+    JOIN tickets AS t ON t.id = tickets_fts.rowid
+    WHERE tickets_fts MATCH :query AND tickets_fts.rowid >= :min_rowid
+    ORDER BY bm25(tickets_fts, 2.0, 1.0)
+    LIMIT :limit OFFSET :offset
+""").columns(opened_at=db.DateTime)
+
+_RUNBOOKS_SQL = db.text(f"""
+    SELECT r.id, r.topic, r.title, r.last_updated,
+           snippet(runbooks_fts, 1, '{_HL_OPEN}', '{_HL_CLOSE}', '…', 24) AS snippet
+    FROM runbooks_fts
+    JOIN runbooks AS r ON r.id = runbooks_fts.rowid
+    WHERE runbooks_fts MATCH :query AND runbooks_fts.rowid >= :min_rowid
+    ORDER BY bm25(runbooks_fts, 4.0, 1.0)
+    LIMIT :limit OFFSET :offset
+""").columns(last_updated=db.DateTime)
+
+
+def fts_query(text: str):
+    """
+    User input -> a safe FTS5 MATCH expression, or None if it has no terms.
+
+    Only word characters survive; each term is quoted (so FTS5 operators
+    and column filters in the input are plain words). A term typed with a
+    trailing "*" stays a prefix match. Terms are ANDed.
+    """
+    terms = _TERM_RE.findall(text or "")[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"{star}' for term, star in terms)
+
+
+def search(text: str, kind: str = "tickets", page: int = 1, per_page: int = SEARCH_PAGE_SIZE) -> dict:
+    """
+    One page of ranked hits for `kind` ("tickets" or "runbooks").
+
+    Returns {"query", "kind", "page", "has_next", "results"}; each result
+    is a dict of the row's columns with "snippet" as plain text and
+    "highlight" as HTML with the matched terms in <mark>.
+    """
+    query = fts_query(text)
+    page = max(1, min(page, MAX_SEARCH_PAGE))
+    out = {"query": text, "kind": kind, "page": page, "has_next": False, "results": []}
+    if query is None:
+        return out
+
+    table = "runbooks_fts" if kind == "runbooks" else "tickets_fts"
+    sql = _RUNBOOKS_SQL if kind == "runbooks" else _TICKETS_SQL
+
+    # Lower rowid bound of the newest RANK_WINDOW matches (0: fewer match)
+    min_rowid = db.session.execute(
+        db.text(f"SELECT rowid FROM {table} WHERE {table} MATCH :query "
+                f"ORDER BY rowid DESC LIMIT 1 OFFSET :window"),
+        {"query": query, "window": RANK_WINDOW - 1},
+    ).scalar() or 0
+
+    rows = db.session.execute(
+        sql,
+        {"query": query, "min_rowid": min_rowid, "limit": per_page + 1, "offset": (page - 1) * per_page},
+    ).mappings().all()
+
+    out["has_next"] = len(rows) > per_page and page < MAX_SEARCH_PAGE
+    for row in rows[:per_page]:
+        result = dict(row)
+        result["highlight"] = _highlight(row["snippet"])
+        result["snippet"] = row["snippet"].replace(_HL_OPEN, "").replace(_HL_CLOSE, "")
+        out["results"].append(result)
+    return out
+
+
+def _highlight(snippet: str) -> Markup:
+    return Markup(
+        str(escape(snippet)).replace(_HL_OPEN, "<mark>").replace(_HL_CLOSE, "</mark>")
+    )
@@ -1,121 +1,411 @@
 # app/services/snow_ingest.py
+import codecs
 import csv
-import io
+import hashlib
 from datetime import datetime
+from itertools import chain, islice
+from operator import itemgetter
+
+from flask import current_app
+from sqlalchemy import insert, select, update
 
 from ..extensions import db
 from ..models import Ticket
+from ..signals import data_changed
+from .redaction import redact_records
+from .topic_stats import record_topic_moves
+
+SNOW_ENCODING = "cp1252"
+INGEST_CHUNK_SIZE = 2000    # rows per commit; bounds session + memory use
+DATE_SAMPLE_ROWS = 200      # rows buffered to detect each date column's format
+
+# Ticket field -> ServiceNow header variants, in order of preference.
+# Order of this dict is the layout of the record tuples produced below.
+COLUMN_ALIASES = {
+    "number": ("Number", "number", "inc_number"),
+    "short_description": ("Short description", "inc_short_description"),
+    "description": ("Description", "inc_description"),
+    "work_notes": ("Work notes",),
+    "resolution_notes": ("Close notes",),
+    "category": ("Category", "inc_cmdb_ci.category"),
+    "subcategory": ("Subcategory", "inc_cmdb_ci.subcategory"),
+    "assignment_group": ("Assignment group", "inc_assignment_group"),
+    "ci": ("Configuration item",),
+    "opened_at": ("Opened", "Opened at", "inc_opened_at"),
+    "closed_at": ("Closed", "Closed at", "inc_resolved_at"),
+}
+DATE_FIELDS = ("opened_at", "closed_at")
+
+# Candidate formats, tried once per column against a sample
+ISO_DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d")   # parsed by fromisoformat
+DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y",
+    "%d-%m-%Y %H:%M:%S",
+)
+
+# Fields refreshed on re-import, but only when the CSV carries a value
+MERGE_FIELDS = (
+    "short_description",
+    "description",
+    "category",
+    "subcategory",
+    "assignment_group",
+    "ci",
+    "opened_at",
+    "closed_at",
+)
 
+# Every ingested field, in the fixed order used for the row fingerprint
+HASH_FIELDS = MERGE_FIELDS + ("work_notes", "resolution_notes")
 
-def import_snow_csv(file_storage):
+# Layout of a normalised record tuple
+RECORD_FIELDS = tuple(COLUMN_ALIASES) + ("content_hash",)
+
+
+def _iter_decoded_lines(stream, encoding=SNOW_ENCODING):
+    """
+    Decode a binary upload stream line by line.
+
+    Uses an incremental decoder so nothing larger than one physical line
+    is ever held in memory; csv.reader stitches quoted multi-line fields
+    back together on its own.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="ignore")
+    for raw in stream:
+        text = decoder.decode(raw)
+        if text:
+            yield text
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def import_snow_csv(file_storage, on_progress=None, chunk_size=INGEST_CHUNK_SIZE):
     """
     Robust CSV loader for ServiceNow exports.
 
     Handles:
       - Windows-1252 encoding
-      - enormous files
+      - enormous files (streamed, committed every `chunk_size` rows)
+      - header variants across export flavours, and per-column date formats
       - repeated rows
       - multi-line/duplicate SLA-based rows
       - updates existing tickets instead of inserting duplicates
+      - skips rows identical to the last import of the same ticket
+
+    `file_storage` may be a werkzeug FileStorage or any binary file object.
+    `on_progress`, if given, is called with the running counters after
+    every committed chunk.
     """
 
-    raw_bytes = file_storage.read()
-    text = raw_bytes.decode("cp1252", errors="ignore")
+    stream = getattr(file_storage, "stream", file_storage)
+    return ingest_records(iter_snow_records(stream), on_progress, chunk_size)
 
-    reader = csv.DictReader(io.StringIO(text))
 
+def ingest_records(records, on_progress=None, chunk_size=INGEST_CHUNK_SIZE):
+    """
+    Write an iterable of normalised record tuples, committing per chunk.
+
+    Shared by the upload path and the bulk CLI import. The first occurrence
+    of a ticket number wins within one call.
+    """
     seen_numbers = set()   # prevent duplicate inserts in a single upload
-    inserted = 0
-    updated = 0
-    skipped = 0
-
-    for row in reader:
-        number = (
-            row.get("Number")
-            or row.get("number")
-            or row.get("inc_number")
-        )
+    stats = {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0, "unchanged": 0}
+    chunk = []
+
+    def _flush():
+        topics = _write_chunk(chunk, stats)
+        chunk.clear()
+        db.session.commit()
+        if topics:
+            data_changed.send(current_app._get_current_object(), topics=topics)
 
+        print(f"SNOW ingest: {stats['rows']} rows parsed "
+              f"({stats['inserted']} inserted, {stats['updated']} updated, "
+              f"{stats['unchanged']} unchanged, {stats['skipped']} skipped)")
+        if on_progress:
+            on_progress(dict(stats))
+
+    for record in records:
+        stats["rows"] += 1
+
+        number = record[0]
         if not number:
-            skipped += 1
+            stats["skipped"] += 1
             continue
 
         # Skip duplicates inside same CSV
         if number in seen_numbers:
-            skipped += 1
+            stats["skipped"] += 1
             continue
         seen_numbers.add(number)
 
-        # Check if ticket already exists (multiple files over time)
-        existing = Ticket.query.filter_by(number=number).first()
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            _flush()
 
-        if existing:
-            # Update fields if new data is better
-            existing.short_description = row.get("Short description") \
-                                         or row.get("inc_short_description") \
-                                         or existing.short_description
+    _flush()
 
-            existing.description = row.get("Description") \
-                                    or row.get("inc_description") \
-                                    or existing.description
+    return stats
 
-            existing.category = row.get("Category") \
-                                or row.get("inc_cmdb_ci.category") \
-                                or existing.category
 
-            existing.subcategory = row.get("Subcategory") \
-                                   or row.get("inc_cmdb_ci.subcategory") \
-                                   or existing.subcategory
+# -------------------------------------------------------------------
+# Parsing: header mapping, date-format detection, row conversion
+# -------------------------------------------------------------------
 
-            existing.assignment_group = row.get("Assignment group") \
-                                        or row.get("inc_assignment_group") \
-                                        or existing.assignment_group
+def iter_snow_records(stream):
+    """
+    Yield one normalised record tuple (see RECORD_FIELDS) per CSV row.
 
-            existing.ci = row.get("Configuration item") or existing.ci
+    The header is mapped to Ticket fields and each date column's format is
+    detected once per file, so the per-row work is a single precompiled
+    conversion with no dict probing and no strptime guessing.
+    """
+    reader = csv.reader(_iter_decoded_lines(stream))
+    header = next(reader, None)
+    if header is None:
+        return
 
-            existing.opened_at = _parse_date(
-                row.get("Opened") or row.get("inc_opened_at")
-            ) or existing.opened_at
+    columns = _resolve_columns(header)
 
-            existing.closed_at = _parse_date(
-                row.get("Closed") or row.get("inc_resolved_at")
-            ) or existing.closed_at
+    sample = []
+    for row in islice(reader, DATE_SAMPLE_ROWS):
+        sample.append(row)
 
-            updated += 1
-            continue
+    convert = _build_converter(len(header), columns, sample)
 
-        # Create new ticket
-        t = Ticket(
-            number=number,
-            short_description=row.get("Short description") or row.get("inc_short_description") or "",
-            description=row.get("Description") or row.get("inc_description") or "",
-            work_notes=row.get("Work notes") or "",
-            resolution_notes=row.get("Close notes") or "",
-            category=row.get("Category") or row.get("inc_cmdb_ci.category") or "",
-            subcategory=row.get("Subcategory") or row.get("inc_cmdb_ci.subcategory") or "",
-            assignment_group=row.get("Assignment group") or row.get("inc_assignment_group") or "",
-            ci=row.get("Configuration item") or "",
-            opened_at=_parse_date(row.get("Opened") or row.get("inc_opened_at")),
-            closed_at=_parse_date(row.get("Closed") or row.get("inc_resolved_at")),
-        )
+    for row in chain(sample, reader):
+        if row:
+            yield convert(row)
+
+
+def parse_snow_file(path):
+    """Parse a whole export from disk into record tuples (process-pool entry point)."""
+    with open(path, "rb") as fh:
+        return list(iter_snow_records(fh))
 
-        db.session.add(t)
-        inserted += 1
 
-    db.session.commit()
+def _resolve_columns(header) -> dict:
+    """Map each Ticket field to the header positions that may carry it."""
+    positions = {}
+    for i, name in enumerate(header):
+        # Strip stray BOMs (raw or cp1252-decoded) from Excel-saved exports
+        name = name.strip().lstrip("\ufeff\u00ef\u00bb\u00bf")
+        positions[name] = i   # like DictReader: last duplicate wins
 
     return {
-        "inserted": inserted,
-        "updated": updated,
-        "skipped": skipped
+        field: tuple(positions[a] for a in aliases if a in positions)
+        for field, aliases in COLUMN_ALIASES.items()
+    }
+
+
+def _detect_date_format(values):
+    """First candidate format that parses every sampled value, if any."""
+    values = [v for v in values if v]
+    if not values:
+        return None
+
+    for fmt in DATE_FORMATS:
+        try:
+            for v in values:
+                datetime.strptime(v, fmt)
+        except ValueError:
+            continue
+        return fmt
+
+    return None
+
+
+def _make_date_parser(fmt):
+    """Parser for one column: fast path on the detected format, full search otherwise."""
+    if fmt is None:
+        return _parse_date
+
+    if fmt in ISO_DATE_FORMATS:
+        fast = datetime.fromisoformat
+    else:
+        fast = lambda s, strptime=datetime.strptime: strptime(s, fmt)
+
+    def parse(s):
+        if not s:
+            return None
+        try:
+            return fast(s)
+        except ValueError:
+            return _parse_date(s)
+
+    return parse
+
+
+def _build_converter(width, columns, sample):
+    """
+    Compile the row -> record tuple function for one file.
+
+    Every field reads its preferred column through a single itemgetter; the
+    rare exports that carry two variants of a field fall back per row to the
+    next non-empty variant, as the old `a or b` chains did.
+    """
+    missing = width    # index of the blank cell appended to every row
+    fields = list(COLUMN_ALIASES)
+
+    pick = itemgetter(*[columns[f][0] if columns[f] else missing for f in fields])
+    fallbacks = [
+        (pos, columns[f][1:])
+        for pos, f in enumerate(fields)
+        if len(columns[f]) > 1 and f not in DATE_FIELDS
+    ]
+
+    # Each date field: (tuple position, [(column, parser), ...])
+    date_specs = []
+    for f in DATE_FIELDS:
+        parsers = [
+            (i, _make_date_parser(_detect_date_format(row[i] for row in sample if len(row) > i)))
+            for i in columns[f]
+        ]
+        date_specs.append((fields.index(f), parsers))
+
+    hash_pos = [fields.index(f) for f in HASH_FIELDS]
+    sha1 = hashlib.sha1
+
+    def convert(row):
+        if len(row) != width:
+            row = row[:width] + [""] * (width - len(row))
+        row.append("")
+
+        values = list(pick(row))
+
+        for pos, alternates in fallbacks:
+            if not values[pos]:
+                for i in alternates:
+                    if row[i]:
+                        values[pos] = row[i]
+                        break
+
+        for pos, parsers in date_specs:
+            parsed = None
+            for i, parse in parsers:
+                if row[i]:
+                    parsed = parse(row[i])
+                    break
+            values[pos] = parsed
+
+        parts = []
+        for pos in hash_pos:
+            value = values[pos]
+            if value.__class__ is datetime:
+                value = value.isoformat()
+            parts.append(value or "")
+        values.append(sha1("\x1f".join(parts).encode("utf-8")).hexdigest())
+
+        return tuple(values)
+
+    return convert
+
+
+def _write_chunk(records, stats):
+    """
+    Upsert a chunk of normalised records.
+
+    Existing tickets are resolved with one IN (...) query per chunk. Rows
+    whose fingerprint matches the stored content_hash are dropped right
+    there; only the changed remainder has its current values loaded and
+    merged. Inserts and updates then go out as two executemany statements.
+    Updates keep the old value for any field the CSV left empty.
+
+    A ticket whose merged content really changed gets its topic cleared
+    (so it is re-classified, and leaves its topic's stats) and updated_at
+    bumped (so its runbook is stale).
+    New and changed rows also get their scrubbed prompt text stored here,
+    so runbook generation never has to scrub them again.
+
+    Returns the topics that lost tickets (new tickets have none yet).
+    """
+    if not records:
+        return set()
+
+    records = [dict(zip(RECORD_FIELDS, r)) for r in records]
+
+    known = {
+        row.number: row
+        for row in db.session.execute(
+            select(Ticket.id, Ticket.number, Ticket.content_hash)
+            .where(Ticket.number.in_([r["number"] for r in records]))
+        )
     }
 
+    inserts = []
+    changed = []
+    for rec in records:
+        current = known.get(rec["number"])
+        if current is None:
+            inserts.append(rec)
+        elif current.content_hash == rec["content_hash"]:
+            stats["unchanged"] += 1
+        else:
+            changed.append((current.id, rec))
+
+    now = datetime.utcnow()
+    updates = []
+    rehashed = []   # row differs only in fields we never overwrite
+    left_topics = []
+    if changed:
+        cols = [getattr(Ticket, f) for f in MERGE_FIELDS]
+        current_rows = {
+            row.id: row
+            for row in db.session.execute(
+                select(Ticket.id, Ticket.topic, *cols)
+                .where(Ticket.id.in_([ticket_id for ticket_id, _ in changed]))
+            )
+        }
+
+        for ticket_id, rec in changed:
+            current = current_rows[ticket_id]
+            merged = {"id": ticket_id, "content_hash": rec["content_hash"]}
+            for field in MERGE_FIELDS:
+                value = rec[field] or getattr(current, field)
+                if value != getattr(current, field):
+                    merged[field] = value
+
+            if len(merged) == 2:
+                rehashed.append(merged)
+                continue
+
+            for field in MERGE_FIELDS:
+                merged.setdefault(field, getattr(current, field))
+            merged["topic"] = None
+            merged["updated_at"] = now
+            updates.append(merged)
+            left_topics.append((current.topic, current.closed_at))
+
+    redact_records(inserts + updates)
+
+    if inserts:
+        for rec in inserts:
+            rec["updated_at"] = now
+        db.session.execute(insert(Ticket), inserts)
+    if updates:
+        db.session.execute(update(Ticket), updates)
+    if rehashed:
+        db.session.execute(update(Ticket), rehashed)
+    record_topic_moves(left=left_topics)
+
+    stats["inserted"] += len(inserts)
+    stats["updated"] += len(updates)
+    stats["unchanged"] += len(rehashed)
+
+    return {topic for topic, _ in left_topics if topic is not None}
+
 
 def _parse_date(s):
     if not s:
         return None
 
-    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%m/%d/%Y %H:%M"):
+    for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(s, fmt)
         except Exception:
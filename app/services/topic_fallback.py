@@ -0,0 +1,114 @@
+# app/services/topic_fallback.py
+import json
+
+from flask import current_app
+
+from ..extensions import db
+from ..models import TopicCache
+from .ai_client import call_llm
+from .classifier import TAXONOMY, text_fingerprint
+from .phi_scrub import scrub_text
+
+FALLBACK_TEXT_CHARS = 400       # per-ticket text sent to the model
+ALLOWED_TOPICS = list(TAXONOMY) + ["other"]
+CACHE_LOOKUP_CHUNK = 500        # hashes per IN (...) lookup
+
+
+def resolve_other_topics(texts: list[str], allow_llm: bool = True) -> list[str]:
+    """
+    Second opinion for tickets the rules classified as "other".
+
+    `texts` are normalised ticket texts (classifier._ticket_text). Answers
+    are cached by text fingerprint, so a recurring wording is sent to the
+    model at most once; misses are packed LLM_FALLBACK_BATCH_SIZE to a
+    prompt and the answer is constrained to the known topic list. With
+    `allow_llm=False` only the cache is consulted. New answers are added
+    to the session for the caller to commit.
+
+    Returns one topic per input text ("other" when nothing better is known).
+    """
+    hashes = [text_fingerprint(t) for t in texts]
+    known = _cached_topics(set(hashes))
+
+    if allow_llm and current_app.config.get("LLM_TOPIC_FALLBACK", True):
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in known and text.strip():
+                missing.setdefault(h, text)
+
+        batch_size = current_app.config.get("LLM_FALLBACK_BATCH_SIZE", 20)
+        items = list(missing.items())
+        answered = {}
+        for i in range(0, len(items), batch_size):
+            answered.update(_classify_batch_with_llm(items[i : i + batch_size]))
+
+        # Staged in the caller's unit of work, which commits them with the
+        # topic changes. Flushed only after the last model call, so SQLite's
+        # write lock is not held while waiting on the LLM
+        for h, topic in answered.items():
+            db.session.merge(TopicCache(text_hash=h, topic=topic))
+        db.session.flush()
+        known.update(answered)
+
+    return [known.get(h) or "other" for h in hashes]
+
+
+def _cached_topics(hashes: set[str]) -> dict:
+    found = {}
+    hashes = list(hashes)
+    for i in range(0, len(hashes), CACHE_LOOKUP_CHUNK):
+        rows = (
+            db.session.query(TopicCache.text_hash, TopicCache.topic)
+            .filter(TopicCache.text_hash.in_(hashes[i : i + CACHE_LOOKUP_CHUNK]))
+            .all()
+        )
+        # Drop answers for topics that have since left the taxonomy
+        found.update({h: t for h, t in rows if t in ALLOWED_TOPICS})
+    return found
+
+
+def _classify_batch_with_llm(items: list[tuple[str, str]]) -> dict:
+    """One prompt for a batch of (hash, text); returns {hash: topic}."""
+    lines = [
+        f"{n}: {scrub_text(text[:FALLBACK_TEXT_CHARS])}"
+        for n, (_, text) in enumerate(items, start=1)
+    ]
+
+    prompt = f"""
+You are classifying IT service desk tickets into topics.
+
+Allowed topics (use these exact strings, nothing else):
+{", ".join(ALLOWED_TOPICS)}
+
+Tickets, one per line as "<number>: <text>" (already scrubbed of PHI):
+{chr(10).join(lines)}
+
+Return ONLY a JSON object mapping every ticket number to one allowed topic,
+for example {{"1": "access_issue", "2": "other"}}. Use "other" when unsure.
+"""
+    answer = _parse_answer(call_llm(prompt))
+    if answer is None:
+        # Model unavailable or unparseable: leave these uncached for next time
+        return {}
+
+    result = {}
+    for n, (h, _) in enumerate(items, start=1):
+        topic = answer.get(str(n))
+        if topic not in ALLOWED_TOPICS:
+            topic = "other"
+        result[h] = topic
+    return result
+
+
+def _parse_answer(raw: str):
+    """JSON object from the model reply, or None if there is none."""
+    text = (raw or "").strip()
+    try:
+        start = text.index("{")
+        end = text.rindex("}") + 1
+        data = json.loads(text[start:end])
+    except Exception as e:
+        print("Topic fallback parse failed:", e)
+        return None
+
+    return {str(k): v for k, v in data.items()} if isinstance(data, dict) else None
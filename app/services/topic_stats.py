@@ -0,0 +1,134 @@
+# app/services/topic_stats.py
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert as core_insert, select
+from sqlalchemy.dialects.sqlite import insert
+
+from ..extensions import db
+from ..models import Runbook, Ticket, TopicStat
+
+# Per-topic counters behind the dashboard. Every path that moves tickets
+# between topics (ingest clearing a changed ticket's topic, classification,
+# reclassification) reports the moves here before its own commit, so the
+# counters land in the same transaction as the tickets. Updates are
+# relative (col = col + delta), so concurrent writers never lose counts,
+# and only touched topics are visited: newest_opened_at is a MAX() seek
+# on ix_tickets_topic_opened_at_id.
+
+COUNTERS = ("ticket_count", "open_count", "closed_count", "changes_since_runbook")
+
+
+def record_topic_moves(left=(), joined=()) -> None:
+    """
+    Apply ticket moves to topic_stats; the caller commits.
+
+    `left` and `joined` are (topic, closed_at) pairs for tickets that left
+    or joined a topic; None topics are ignored. Either way the topic's
+    ticket set changed, which counts towards changes_since_runbook.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for sign, moves in ((-1, left), (1, joined)):
+        for topic, closed_at in moves:
+            if topic is None:
+                continue
+            d = deltas[topic]
+            d["ticket_count"] += sign
+            d["open_count" if closed_at is None else "closed_count"] += sign
+            d["changes_since_runbook"] += 1
+
+    if not deltas:
+        return
+
+    db.session.flush()   # newest_opened_at must see the moves
+    now = datetime.utcnow()
+    rows = [
+        dict(d, topic=topic, newest_opened_at=_newest_opened_at(topic), updated_at=now)
+        for topic, d in deltas.items()
+    ]
+
+    stmt = insert(TopicStat)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TopicStat.topic],
+        set_={
+            **{col: getattr(TopicStat, col) + getattr(stmt.excluded, col) for col in COUNTERS},
+            "newest_opened_at": stmt.excluded.newest_opened_at,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    db.session.execute(stmt, rows)
+
+
+def record_runbook(rb: Runbook, pending: int = 0) -> None:
+    """
+    Point the topic's stats at its freshly built runbook, with `pending`
+    changes still to cover (0 unless the run was incomplete); the caller
+    commits.
+    """
+    now = datetime.utcnow()
+    values = {
+        "runbook_id": rb.id,
+        "runbook_title": rb.title,
+        "runbook_updated_at": rb.last_updated,
+        "changes_since_runbook": pending,
+        "updated_at": now,
+    }
+    stmt = insert(TopicStat).values(topic=rb.topic, ticket_count=0, open_count=0, closed_count=0, **values)
+    db.session.execute(stmt.on_conflict_do_update(index_elements=[TopicStat.topic], set_=values))
+
+
+def rebuild_topic_stats() -> int:
+    """
+    Recompute topic_stats from scratch (full scan; for repairs and after
+    bulk SQL edits). Pending changes are taken as the tickets updated
+    since the runbook was built (all of them without one, or when it came
+    from an incomplete run). Commits;
+    returns the number of topics.
+    """
+    db.session.execute(delete(TopicStat))
+
+    counts = (
+        select(
+            Ticket.topic,
+            func.count(Ticket.id).label("ticket_count"),
+            func.count(Ticket.id).filter(Ticket.closed_at.is_(None)).label("open_count"),
+            func.count(Ticket.closed_at).label("closed_count"),
+            func.max(Ticket.opened_at).label("newest_opened_at"),
+        )
+        .where(Ticket.topic.isnot(None))
+        .group_by(Ticket.topic)
+    )
+    db.session.execute(
+        core_insert(TopicStat).from_select(
+            ["topic", "ticket_count", "open_count", "closed_count", "newest_opened_at"], counts
+        )
+    )
+    # With no runbook yet, every ticket in the topic is a pending change
+    db.session.execute(TopicStat.__table__.update().values(changes_since_runbook=TopicStat.ticket_count))
+
+    for rb in db.session.query(
+        Runbook.id, Runbook.topic, Runbook.title, Runbook.last_updated, Runbook.input_fingerprint
+    ):
+        changed = db.session.query(func.count(Ticket.id)).filter(Ticket.topic == rb.topic)
+        if rb.input_fingerprint is not None:
+            # (an incomplete run's runbook covers none of them)
+            changed = changed.filter(Ticket.updated_at > rb.last_updated)
+        changed = changed.scalar()
+        values = {
+            "runbook_id": rb.id,
+            "runbook_title": rb.title,
+            "runbook_updated_at": rb.last_updated,
+            "changes_since_runbook": changed,
+        }
+        stmt = insert(TopicStat).values(topic=rb.topic, ticket_count=0, open_count=0, closed_count=0, **values)
+        db.session.execute(stmt.on_conflict_do_update(index_elements=[TopicStat.topic], set_=values))
+
+    db.session.execute(
+        TopicStat.__table__.update().values(updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return TopicStat.query.count()
+
+
+def _newest_opened_at(topic: str):
+    return db.session.execute(select(func.max(Ticket.opened_at)).where(Ticket.topic == topic)).scalar()
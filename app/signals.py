@@ -0,0 +1,9 @@
+# app/signals.py
+from blinker import Namespace
+
+_signals = Namespace()
+
+# Sent after a commit that changes what the read pages show. Keyword
+# arguments: topics (iterable of affected topics, None = could be any) and
+# runbook_id (a runbook whose content changed, if any).
+data_changed = _signals.signal("data-changed")
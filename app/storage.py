@@ -0,0 +1,48 @@
+# app/storage.py
+from sqlalchemy import event
+
+# SQLite pragmas are per connection (journal_mode is persisted in the file,
+# the rest are not), so they are set from a "connect" hook on the engine
+# and every pooled connection gets the same profile.
+
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def sqlite_pragmas(config) -> dict:
+    """The storage profile from config as {pragma: value}, validated."""
+    journal_mode = str(config.get("SQLITE_JOURNAL_MODE", "WAL")).upper()
+    synchronous = str(config.get("SQLITE_SYNCHRONOUS", "NORMAL")).upper()
+    if journal_mode not in _JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE must be one of {sorted(_JOURNAL_MODES)}, got {journal_mode!r}")
+    if synchronous not in _SYNCHRONOUS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {sorted(_SYNCHRONOUS)}, got {synchronous!r}")
+
+    return {
+        "busy_timeout": int(config.get("SQLITE_BUSY_TIMEOUT_MS", 30000)),
+        "journal_mode": journal_mode,
+        "synchronous": synchronous,
+        "cache_size": -int(config.get("SQLITE_CACHE_SIZE_KB", 16 * 1024)),   # negative = KiB, not pages
+        "mmap_size": int(config.get("SQLITE_MMAP_SIZE", 0)),
+    }
+
+
+def apply_sqlite_pragmas(dbapi_conn, pragmas: dict):
+    # busy_timeout first, so switching journal_mode waits out other connections
+    cursor = dbapi_conn.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def install_sqlite_profile(engine, config):
+    """Apply the configured pragmas to each new connection of a SQLite engine."""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        apply_sqlite_pragmas(dbapi_conn, pragmas)
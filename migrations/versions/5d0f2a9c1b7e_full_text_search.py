@@ -0,0 +1,73 @@
+"""full text search
+
+Revision ID: 5d0f2a9c1b7e
+Revises: e880168f872e
+Create Date: 2026-10-17 08:20:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0f2a9c1b7e'
+down_revision = 'e880168f872e'
+branch_labels = None
+depends_on = None
+
+
+# Same statements as TICKETS_FTS_DDL / RUNBOOKS_FTS_DDL in app/models.py
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5("
+    "short_description_scrubbed, description_scrubbed, "
+    "content='tickets', content_rowid='id', tokenize='porter unicode61')",
+
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_ai AFTER INSERT ON tickets BEGIN "
+    "INSERT INTO tickets_fts (rowid, short_description_scrubbed, description_scrubbed) "
+    "VALUES (new.id, new.short_description_scrubbed, new.description_scrubbed); END",
+
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_ad AFTER DELETE ON tickets BEGIN "
+    "INSERT INTO tickets_fts (tickets_fts, rowid, short_description_scrubbed, description_scrubbed) "
+    "VALUES ('delete', old.id, old.short_description_scrubbed, old.description_scrubbed); END",
+
+    "CREATE TRIGGER IF NOT EXISTS tickets_fts_au "
+    "AFTER UPDATE OF short_description_scrubbed, description_scrubbed ON tickets BEGIN "
+    "INSERT INTO tickets_fts (tickets_fts, rowid, short_description_scrubbed, description_scrubbed) "
+    "VALUES ('delete', old.id, old.short_description_scrubbed, old.description_scrubbed); "
+    "INSERT INTO tickets_fts (rowid, short_description_scrubbed, description_scrubbed) "
+    "VALUES (new.id, new.short_description_scrubbed, new.description_scrubbed); END",
+
+    "CREATE VIRTUAL TABLE IF NOT EXISTS runbooks_fts USING fts5("
+    "title, markdown, content='runbooks', content_rowid='id', tokenize='porter unicode61')",
+
+    "CREATE TRIGGER IF NOT EXISTS runbooks_fts_ai AFTER INSERT ON runbooks BEGIN "
+    "INSERT INTO runbooks_fts (rowid, title, markdown) VALUES (new.id, new.title, new.markdown); END",
+
+    "CREATE TRIGGER IF NOT EXISTS runbooks_fts_ad AFTER DELETE ON runbooks BEGIN "
+    "INSERT INTO runbooks_fts (runbooks_fts, rowid, title, markdown) "
+    "VALUES ('delete', old.id, old.title, old.markdown); END",
+
+    "CREATE TRIGGER IF NOT EXISTS runbooks_fts_au AFTER UPDATE OF title, markdown ON runbooks BEGIN "
+    "INSERT INTO runbooks_fts (runbooks_fts, rowid, title, markdown) "
+    "VALUES ('delete', old.id, old.title, old.markdown); "
+    "INSERT INTO runbooks_fts (rowid, title, markdown) VALUES (new.id, new.title, new.markdown); END",
+]
+
+
+def upgrade():
+    for statement in FTS_DDL:
+        op.execute(statement)
+
+    # Index what is already there
+    op.execute("INSERT INTO tickets_fts (tickets_fts) VALUES ('rebuild')")
+    op.execute("INSERT INTO runbooks_fts (runbooks_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    for trigger in (
+        "tickets_fts_ai", "tickets_fts_ad", "tickets_fts_au",
+        "runbooks_fts_ai", "runbooks_fts_ad", "runbooks_fts_au",
+    ):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS tickets_fts")
+    op.execute("DROP TABLE IF EXISTS runbooks_fts")
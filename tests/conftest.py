@@ -0,0 +1,23 @@
+# tests/conftest.py
+import pytest
+
+from app.config import Config
+from app.extensions import db
+
+# An app on a throwaway SQLite file: create_app() builds the schema on an
+# empty database. No LLM is reachable, so nothing may fall back to one.
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SQLALCHEMY_DATABASE_URI", f"sqlite:///{tmp_path / 'runbook.db'}")
+    monkeypatch.setattr(Config, "LLM_CACHE_PATH", tmp_path / "llm_cache.db")
+    monkeypatch.setattr(Config, "UPLOAD_DIR", tmp_path / "uploads")
+    monkeypatch.setattr(Config, "LLM_TOPIC_FALLBACK", False)
+
+    from app import create_app
+    app = create_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,104 @@
+# tests/test_snow_ingest.py
+import io
+
+from app.extensions import db
+from app.models import Ticket
+from app.services.snow_ingest import import_snow_csv
+
+# Re-import semantics of the upsert: overlapping daily exports must not
+# wipe fields, re-classify untouched tickets or let a later duplicate win.
+
+_HEADER = ("Number,Short description,Description,Work notes,Close notes,Category,"
+           "Subcategory,Assignment group,Configuration item,Opened at,Closed at")
+
+
+def _row(number, short="VPN failure", description="Tunnel drops", work_notes="Checked logs",
+         category="Infrastructure", opened="2024-06-02 08:00:00"):
+    return (f'{number},{short},{description},"{work_notes}",Restarted,{category},'
+            f"VPN,Network Team,VPN Server,{opened},")
+
+
+def _import(*rows, **kwargs):
+    csv = "\n".join((_HEADER,) + rows) + "\n"
+    stats = import_snow_csv(io.BytesIO(csv.encode("cp1252")), **kwargs)
+    db.session.expire_all()
+    return stats
+
+
+def _ticket(number) -> Ticket:
+    return Ticket.query.filter_by(number=number).one()
+
+
+def _classify(number, topic="network_issue"):
+    ticket = _ticket(number)
+    ticket.topic = topic
+    db.session.commit()
+    return ticket
+
+
+def test_identical_reimport_is_skipped_by_fingerprint(app):
+    _import(_row("INC1"), _row("INC2"))
+    before = {t.number: (t.content_hash, t.updated_at) for t in Ticket.query}
+    _classify("INC1")
+
+    stats = _import(_row("INC1"), _row("INC2"))
+
+    assert stats == {"rows": 2, "inserted": 0, "updated": 0, "skipped": 0, "unchanged": 2}
+    assert {t.number: (t.content_hash, t.updated_at) for t in Ticket.query} == before
+    assert _ticket("INC1").topic == "network_issue"
+
+
+def test_empty_field_keeps_old_value(app):
+    _import(_row("INC1", category="Infrastructure"))
+
+    stats = _import(_row("INC1", description="Tunnel drops after patching", category=""))
+
+    ticket = _ticket("INC1")
+    assert stats["updated"] == 1
+    assert ticket.description == "Tunnel drops after patching"
+    assert ticket.category == "Infrastructure"
+
+
+def test_content_change_clears_topic_and_bumps_updated_at(app):
+    _import(_row("INC1"))
+    before = _classify("INC1").updated_at
+
+    _import(_row("INC1", short="VPN failure for all users"))
+
+    ticket = _ticket("INC1")
+    assert ticket.short_description == "VPN failure for all users"
+    assert ticket.topic is None
+    assert ticket.updated_at > before
+
+
+def test_rehash_only_row_counts_as_unchanged(app):
+    _import(_row("INC1"))
+    before = _classify("INC1")
+    old_hash, old_updated_at = before.content_hash, before.updated_at
+
+    # Work notes are fingerprinted but never merged; an emptied field is
+    # kept. Neither changes the ticket, only its stored fingerprint.
+    stats = _import(_row("INC1", work_notes="Escalated to vendor", category=""))
+
+    ticket = _ticket("INC1")
+    assert stats["unchanged"] == 1 and stats["updated"] == 0
+    assert ticket.content_hash != old_hash
+    assert ticket.topic == "network_issue"
+    assert ticket.updated_at == old_updated_at
+    assert ticket.category == "Infrastructure"
+
+    # ...so the same row next time is a plain fingerprint match
+    stats = _import(_row("INC1", work_notes="Escalated to vendor", category=""))
+    assert stats["unchanged"] == 1
+
+
+def test_first_duplicate_in_a_run_wins(app):
+    # chunk_size=1 puts the duplicate in a later chunk than the original
+    stats = _import(
+        _row("INC1", short="First copy"),
+        _row("INC1", short="Second copy"),
+        chunk_size=1,
+    )
+
+    assert stats["inserted"] == 1 and stats["skipped"] == 1
+    assert _ticket("INC1").short_description == "First copy"
@@ -0,0 +1,74 @@
+# tests/test_topic_page.py
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.models import Ticket
+from app.routes import main
+
+# Keyset paging of a topic's tickets: newest opened first (ties by id),
+# then the undated tail by id. Walking every page must list each ticket
+# exactly once, wherever the page boundary falls relative to the tail.
+
+
+def _add_tickets(dated: int, undated: int, topic="vpn"):
+    opened = [datetime(2024, 6, 1 + i // 2) for i in range(dated)]    # pairs share a date
+    for i, ts in enumerate(opened + [None] * undated):
+        db.session.add(Ticket(number=f"INC{i:04d}", topic=topic, opened_at=ts))
+    db.session.add(Ticket(number="OTHER", topic="email", opened_at=datetime(2024, 7, 1)))
+    db.session.commit()
+
+    tickets = Ticket.query.filter_by(topic=topic).all()
+    dated_order = sorted(
+        (t for t in tickets if t.opened_at), key=lambda t: (t.opened_at, t.id), reverse=True
+    )
+    undated_order = sorted((t for t in tickets if not t.opened_at), key=lambda t: t.id, reverse=True)
+    return [t.id for t in dated_order + undated_order]
+
+
+def _walk(app, topic="vpn"):
+    pages, cursor = [], None
+    while True:
+        with app.test_request_context():
+            rows, cursor = main._topic_page(topic, cursor)
+        pages.append([t.id for t in rows])
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("dated, undated", [
+    (3, 3),     # the tail starts mid-page
+    (4, 3),     # a page ends on the last dated ticket
+    (4, 0),
+    (0, 5),
+    (1, 0),
+])
+def test_pages_cover_topic_once_in_order(app, monkeypatch, dated, undated):
+    monkeypatch.setattr(main, "TOPIC_PAGE_SIZE", 2)
+    expected = _add_tickets(dated, undated)
+
+    pages = _walk(app)
+
+    assert [i for page in pages for i in page] == expected
+    assert all(len(page) == 2 for page in pages[:-1])
+
+
+def test_cursor_marks_the_undated_tail(app, monkeypatch):
+    monkeypatch.setattr(main, "TOPIC_PAGE_SIZE", 2)
+    _add_tickets(dated=1, undated=3)
+
+    with app.test_request_context():
+        first, cursor = main._topic_page("vpn")
+        assert cursor == f"null|{first[-1].id}"
+        second, cursor = main._topic_page("vpn", cursor)
+
+    assert [t.opened_at for t in second] == [None, None]
+    assert cursor is None
+
+
+def test_malformed_cursor_is_rejected(app):
+    from werkzeug.exceptions import BadRequest
+
+    with app.test_request_context(), pytest.raises(BadRequest):
+        main._topic_page("vpn", "yesterday|x")